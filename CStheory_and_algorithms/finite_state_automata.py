@@ -1,4 +1,103 @@
-from pyvis.network import Network
+import json
+import mmap
+import os
+import string
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def _chunk_mapping(columns, symbols, memory=1 << 26):
+    """
+    Compute the full state->state mapping of a chunk of symbols.
+
+    The chunk is split into blocks. Every symbol of a block is turned into its own mapping
+    (a column of the transition table), and the mappings are composed pairwise in a tree,
+    which takes log2(block) vectorized steps instead of one Python step per symbol.
+    A block holds one mapping of all states per symbol, so its length is memory divided by
+    the size of a mapping - the temporary arrays take at most about twice memory bytes.
+
+    :param columns: The transposed transition table, columns[symbol][state] is the next state
+    :param symbols: NumPy array of column indexes
+    :param memory: Number of bytes of the mappings of one block
+    :return: NumPy array, mapping[i] is the state reached after reading the chunk from state i
+    """
+
+    block = max(2, memory // (columns.itemsize * columns.shape[1]))
+    mapping = np.arange(columns.shape[1], dtype=columns.dtype)
+    for start in range(0, symbols.shape[0], block):
+        m = columns[symbols[start:start + block]]
+        while m.shape[0] > 1:
+            last = m[-1:] if m.shape[0] % 2 else None
+            if last is not None:
+                m = m[:-1]
+            # Apply the even mapping first, then the odd one: combined[s] = odd[even[s]]
+            m = np.take_along_axis(m[1::2], m[0::2], axis=1)
+            if last is not None:
+                m = np.concatenate([m, last])
+        mapping = m[0][mapping]
+    return mapping
+
+
+def _walk_mapping(table, rows, symbols, states, block=64):
+    """
+    Map states through a chunk of symbols by walking the transition table, in the current process.
+
+    Entries of states that are -1 (not followed) stay -1. The distinct followed states are advanced
+    together, and states whose paths meet are merged after every block of symbols. A single path is
+    followed with the plain scalar loop of accepts, at the cost of one table lookup per symbol.
+
+    :param table: The transition table, table[state][symbol] is the next state
+    :param rows: The transition table as nested lists
+    :param symbols: NumPy array of column indexes
+    :param states: NumPy array of the states to map, or -1
+    :return: NumPy array of the states reached after the chunk from every entry of states
+    """
+
+    followed = states >= 0
+    current, inverse = np.unique(states[followed], return_inverse=True)
+    position = 0
+    while current.shape[0] > 1 and position < symbols.shape[0]:
+        for symbol in symbols[position:position + block].tolist():
+            current = table[current, symbol]
+        position += block
+        current, merged = np.unique(current, return_inverse=True)
+        inverse = merged[inverse]
+    if current.shape[0] == 1 and position < symbols.shape[0]:
+        state = int(current[0])
+        for symbol in symbols[position:].tolist():
+            state = rows[state][symbol]
+        current = np.array([state])
+    result = np.full(states.shape[0], -1, dtype=np.int32)
+    result[followed] = current[inverse]
+    return result
+
+
+def _file_chunk_mapping(args):
+    """
+    Worker function - memory-map a range of a file and compute its state->state mapping.
+
+    :param args: A (columns, byte_map, path, start, end) tuple
+    :return: The state->state mapping of bytes start..end of the file
+    """
+
+    columns, byte_map, path, start, end = args
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        symbols = byte_map[np.frombuffer(buffer, dtype=np.uint8, count=end - start, offset=start)]
+        return _chunk_mapping(columns, symbols)
+
+
+def _buffer_chunk_mapping(args):
+    """
+    Worker function - compute the state->state mapping of an in-memory chunk.
+
+    :param args: A (columns, byte_map, chunk) tuple
+    :return: The state->state mapping of the chunk
+    """
+
+    columns, byte_map, chunk = args
+    return _chunk_mapping(columns, byte_map[np.frombuffer(chunk, dtype=np.uint8)])
 
 
 # finite-state automaton
@@ -66,65 +165,977 @@ class Fsa:
             else f'Input \'{inp}\' is NOT accepted by the automaton.\n'
         print(result)
 
-    def draw(self):
+    def compile(self):
+        """
+        Compile the automaton into an integer-indexed NumPy transition table.
+
+        States and symbols are numbered in the order they appear in `states` and `alphabet`.
+        An extra dead state (index len(states)) absorbs missing transitions and invalid symbols,
+        so matching never has to branch on them. The table has an extra column for symbols
+        outside the alphabet, which leads to the dead state.
+
+        :return: The automaton itself, so calls can be chained
+        """
+
+        self._state_index = {state: i for i, state in enumerate(self.states)}
+        self._dead = len(self.states)
+        self._invalid = len(self.alphabet)
+
+        # Map unicode code points of the symbols to column indexes
+        self._code_map = np.full(max(ord(symbol) for symbol in self.alphabet) + 1, self._invalid, dtype=np.int32)
+        for i, symbol in enumerate(self.alphabet):
+            self._code_map[ord(symbol)] = i
+
+        dtype = np.int32
+        self._table = np.full((self._dead + 1, self._invalid + 1), self._dead, dtype=dtype)
+        for (source, symbol), dest in self.delta.items():
+            if source in self._state_index and dest in self._state_index and symbol in self.alphabet:
+                self._table[self._state_index[source], self.alphabet.index(symbol)] = self._state_index[dest]
+
+        self._accepting = np.zeros(self._dead + 1, dtype=bool)
+        for state in self.final_states:
+            if state in self._state_index:
+                self._accepting[self._state_index[state]] = True
+
+        self._rows = self._table.tolist()  # Plain lists are faster for the scalar loop in accepts
+
+        # Byte-level view used when scanning files and buffers, symbols are matched byte by byte
+        self._columns = np.ascontiguousarray(self._table.T)
+        self._byte_map = np.full(256, self._invalid, dtype=np.int32)
+        known = min(256, self._code_map.shape[0])
+        self._byte_map[:known] = self._code_map[:known]
+        return self
+
+    def _encode(self, inp):
+        """
+        Convert an input string to an array of symbol (column) indexes.
+
+        :param inp: The input string
+        :return: NumPy array of column indexes, symbols outside the alphabet map to the invalid column
+        """
+
+        codes = np.frombuffer(str(inp).encode('utf-32-le'), dtype=np.uint32)
+        inside = codes < self._code_map.shape[0]
+        return np.where(inside, self._code_map[np.where(inside, codes, 0)], self._invalid)
+
+    def accepts(self, inp):
+        """
+        Silently check whether the input string is accepted, using the compiled transition table.
+
+        :param inp: The input string to check
+        :return: True if the input is accepted, False otherwise
+        """
+
+        if not hasattr(self, '_table'):
+            self.compile()
+
+        rows = self._rows
+        state = self._state_index[self.starting_state]
+        for symbol in self._encode(inp).tolist():
+            state = rows[state][symbol]
+        return bool(self._accepting[state])
+
+    def accepts_many(self, inputs, batch_size=65536):
+        """
+        Check a batch of input strings at once.
+
+        Every batch is sorted by length, longest first, and encoded into one flat array of column indexes.
+        All inputs are advanced one symbol per step with a single vectorized table lookup, and an input
+        drops out of the steps once it is read - the ones still being read are always a prefix of the batch.
+        Memory and work are proportional to the total length of the inputs, however uneven the lengths.
+
+        :param inputs: An iterable of input strings
+        :param batch_size: How many inputs are encoded and advanced together, bounds memory usage
+        :return: NumPy boolean array, True for every accepted input
+        """
+
+        if not hasattr(self, '_table'):
+            self.compile()
+
+        inputs = [str(inp) for inp in inputs]
+        result = np.zeros(len(inputs), dtype=bool)
+        start = self._state_index[self.starting_state]
+        rows = self._rows
+
+        for b in range(0, len(inputs), batch_size):
+            batch = inputs[b:b + batch_size]
+            lengths = np.fromiter((len(inp) for inp in batch), dtype=np.int64, count=len(batch))
+            order = np.argsort(-lengths, kind='stable')
+            lengths = lengths[order]
+            encoded = self._encode(''.join(batch[i] for i in order))
+            offsets = np.cumsum(lengths) - lengths
+            # active[col] - number of inputs longer than col
+            active = len(batch) - np.searchsorted(lengths[::-1], np.arange(lengths[0] if len(batch) else 0), 'right')
+
+            state = np.full(len(batch), start, dtype=np.int32)
+            for col, count in enumerate(active.tolist()):
+                if count <= 64:
+                    # A few long inputs are left - a plain loop is faster than vectorized steps of this size
+                    for i in range(count):
+                        current = int(state[i])
+                        for symbol in encoded[offsets[i] + col:offsets[i] + lengths[i]].tolist():
+                            current = rows[current][symbol]
+                        state[i] = current
+                    break
+                state[:count] = self._table[state[:count], encoded[offsets[:count] + col]]
+            result[b + order] = self._accepting[state]
+
+        return result
+
+    def _combine(self, mappings, resume=None):
+        """
+        Compose chunk mappings in input order.
+
+        :param mappings: An iterable of state->state mappings, in the order of their chunks
+        :param resume: Mapping of everything read before the first chunk, or None
+        :return: The mapping of all the chunks together
+        """
+
+        total = np.arange(self._dead + 1, dtype=np.int32) if resume is None else resume
+        for mapping in mappings:
+            total = np.where(total >= 0, mapping[total], -1)
+        return total
+
+    def _run_chunks(self, worker, jobs, workers, count):
+        """
+        Compute chunk mappings serially or on a process pool, keeping their order.
+
+        Jobs are taken from the iterable only as they are submitted, and at most 2 * workers of them
+        are in flight at once, so the chunks of a huge input are never all held in memory together.
+
+        :param worker: Module-level function computing the mapping of one job
+        :param jobs: An iterable of worker arguments
+        :param workers: Number of processes, 1 computes everything in the current process
+        :param count: Number of jobs
+        :return: A generator of mappings, in the order of jobs
+        """
+
+        if workers == 1 or count <= 1:
+            for job in jobs:
+                yield worker(job)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for job in jobs:
+                pending.append(pool.submit(worker, job))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _composes(self, workers):
+        """
+        Decide whether chunks are mapped by composition on workers or walked serially.
+
+        Composing a symbol costs about as much as a walk step plus a vectorized operation per state,
+        and it only pays off when that work is split among enough workers.
+        """
+
+        return workers > 1 and self._dead + 1 <= 4 * workers
+
+    def _walk(self, chunks, resume=None):
+        """
+        Follow the starting state (or the states of resume) through chunks of bytes serially.
+
+        :param chunks: An iterable of bytes-like chunks, in input order
+        :param resume: Mapping of everything read before the first chunk, or None
+        :return: The mapping of all the chunks together, -1 for the states that were not followed
+        """
+
+        if resume is None:
+            resume = np.full(self._dead + 1, -1, dtype=np.int32)
+            start = self._state_index[self.starting_state]
+            resume[start] = start
+        total = resume
+        for chunk in chunks:
+            total = _walk_mapping(self._table, self._rows, self._byte_map[np.frombuffer(chunk, dtype=np.uint8)], total)
+        return total
+
+    def scan_buffer(self, data, chunk_size=1 << 24, workers=None, resume=None):
+        """
+        Compute the state->state mapping of a bytes-like buffer (bytes, bytearray, mmap),
+        splitting it into chunks that are processed in parallel.
+
+        Every chunk is processed from all states at once, so chunks do not depend on each other
+        and their mappings are combined afterwards by (associative) composition. The result
+        is the same as reading the buffer serially. A chunk is copied only to be sent to a worker
+        process - with a single worker, chunks are read straight from the buffer.
+
+        Composition costs work for every state, so it only pays off for automata with few states on several
+        workers (see _composes). Otherwise the buffer is walked serially from the starting state, one table
+        lookup per symbol, and only the entries of the states followed are computed - the others are -1.
+        Either result can be passed to accepts_mapping and back as resume.
+
+        :param data: A bytes-like object, symbols must be single bytes
+        :param chunk_size: Number of bytes per chunk
+        :param workers: Number of processes, None uses all cores
+        :param resume: Mapping returned by an earlier scan of the data preceding this buffer
+        :return: NumPy array, mapping[i] is the state index reached after the buffer from state i,
+                 or -1 if state i was not followed
+        """
+
+        if not hasattr(self, '_table'):
+            self.compile()
+
+        view = memoryview(data).cast('B')
+        workers = workers or os.cpu_count()
+        if not self._composes(workers):
+            return self._walk((view[i:i + chunk_size] for i in range(0, len(view), chunk_size)), resume)
+        count = -(-len(view) // chunk_size)
+        copy = bytes if workers > 1 and count > 1 else (lambda chunk: chunk)
+        jobs = ((self._columns, self._byte_map, copy(view[i:i + chunk_size])) for i in range(0, len(view), chunk_size))
+        return self._combine(self._run_chunks(_buffer_chunk_mapping, jobs, workers, count), resume)
+
+    def scan_file(self, path, chunk_size=1 << 24, workers=None, resume=None):
+        """
+        Compute the state->state mapping of a file, memory-mapping it in chunks that are processed
+        in parallel. Workers map the file themselves, so chunks are never copied between processes.
+        Automata with too many states for the composition to pay off are walked serially, as in scan_buffer.
+
+        The returned (mapping, offset) pair can be passed back as resume - then only the bytes appended
+        to the file after offset are read.
+
+        :param path: Path to the file, symbols must be single bytes
+        :param chunk_size: Number of bytes per chunk
+        :param workers: Number of processes, None uses all cores
+        :param resume: A (mapping, offset) pair returned by an earlier scan of the same file, or None
+        :return: A (mapping, offset) pair, where offset is the number of bytes read so far
+        """
+
+        if not hasattr(self, '_table'):
+            self.compile()
+
+        mapping, offset = resume if resume is not None else (None, 0)
+        size = os.path.getsize(path)
+        workers = workers or os.cpu_count()
+        if not self._composes(workers):
+            if offset >= size:
+                return self._walk([], mapping), max(size, offset)
+            with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                view = memoryview(buffer)
+                try:
+                    mapping = self._walk((view[i:min(i + chunk_size, size)] for i in range(offset, size, chunk_size)),
+                                         mapping)
+                finally:
+                    view.release()
+            return mapping, size
+        jobs = [(self._columns, self._byte_map, path, i, min(i + chunk_size, size))
+                for i in range(offset, size, chunk_size)]
+        mapping = self._combine(self._run_chunks(_file_chunk_mapping, jobs, workers, len(jobs)), mapping)
+        return mapping, max(size, offset)
+
+    def accepts_mapping(self, mapping):
+        """
+        Check whether the input described by a state->state mapping is accepted.
+
+        :param mapping: A mapping returned by scan_buffer, or the mapping part of the scan_file result
+        :return: True if the input is accepted, False otherwise
+        """
+
+        return bool(self._accepting[mapping[self._state_index[self.starting_state]]])
+
+    def minimize(self):
+        """
+        Build an equivalent automaton with the fewest states using Hopcroft's partition refinement.
+
+        Unreachable states are dropped, and so are states from which no final state can be reached
+        (like sinks) - their transitions become missing transitions, which reject the input the same way.
+        Every state of the new automaton is named after the first original state of its class.
+
+        :return: A new, minimal Fsa
+        """
+
+        if not hasattr(self, '_table'):
+            self.compile()
+
+        table = self._table[:, :len(self.alphabet)].tolist()
+        start = self._state_index[self.starting_state]
+
+        # Keep only the states reachable from the starting state (the dead state is always kept)
+        reachable = {start, self._dead}
+        stack = [start]
+        while stack:
+            for dest in table[stack.pop()]:
+                if dest not in reachable:
+                    reachable.add(dest)
+                    stack.append(dest)
+
+        # Inverse transitions: inverse[symbol][dest] - set of states moving to dest on symbol
+        inverse = [{} for _ in self.alphabet]
+        for source in reachable:
+            for symbol, dest in enumerate(table[source]):
+                inverse[symbol].setdefault(dest, set()).add(source)
+
+        final = {state for state in reachable if self._accepting[state]}
+        partition = [block for block in (final, reachable - final) if block]
+        block_of = {state: i for i, block in enumerate(partition) for state in block}
+        # Blocks waiting to be used as splitters, by index
+        waiting = {min(range(2), key=lambda i: len(partition[i]))} if len(partition) == 2 else set()
+
+        while waiting:
+            splitter = list(partition[waiting.pop()])
+            for symbol in range(len(self.alphabet)):
+                # States which move into the splitter on this symbol, grouped by their block
+                touched = {}
+                for dest in splitter:
+                    for source in inverse[symbol].get(dest, ()):
+                        touched.setdefault(block_of[source], set()).add(source)
+
+                # Split only the blocks which intersect, keeping the larger part under the old index,
+                # so every state is moved to a new block O(log n) times
+                for i, inside in touched.items():
+                    block = partition[i]
+                    if len(inside) == len(block):
+                        continue
+                    outside = block - inside
+                    small, large = (inside, outside) if len(inside) <= len(outside) else (outside, inside)
+                    partition[i] = large
+                    partition.append(small)
+                    for state in small:
+                        block_of[state] = len(partition) - 1
+                    # A waiting block is replaced by both parts, otherwise the smaller part is enough
+                    waiting.add(len(partition) - 1)
+
+        # Name every class after its first original state and drop the class of the dead state
+        dead_block = block_of[self._dead]
+        names = {i: self.states[min(block)] for i, block in enumerate(partition) if i != dead_block}
+
+        states = tuple(names[i] for i in sorted(names, key=lambda i: min(partition[i])))
+        delta = {}
+        for i, name in names.items():
+            for symbol, dest in enumerate(table[min(partition[i])]):
+                if block_of[dest] != dead_block:
+                    delta[(name, self.alphabet[symbol])] = names[block_of[dest]]
+        final_names = {names[block_of[state]] for state in final}
+        final_states = tuple(state for state in states if state in final_names)
+
+        # If the starting state can never accept, keep it as the only (empty) state
+        starting_state = names.get(block_of[start], self.starting_state)
+        if block_of[start] == dead_block:
+            states = (starting_state,)
+
+        return Fsa(states, self.alphabet, delta, starting_state, final_states)
+
+    def _view(self, collapse=False, hide_sinks=False, center=None, depth=2):
+        """
+        Select the states and labelled edges to render.
+
+        :param collapse: Label edges with symbol ranges (a-c) instead of listing every symbol
+        :param hide_sinks: Leave out non-final states from which no final state can be reached
+        :param center: Render only the neighbourhood of this state, None renders the whole automaton
+        :param depth: How many transitions (in either direction) from center are rendered
+        :return: A (states, edges) pair - a list of states and a dictionary mapping every state
+                 to a list of (dest, label) pairs
+        """
+
+        # Group parallel transitions - edges[source][dest] is a list of symbols
+        edges = {state: {} for state in self.states}
+        for (source, symbol), dest in self.delta.items():
+            edges.setdefault(source, {}).setdefault(dest, []).append(symbol)
+
+        visible = set(self.states)
+        if hide_sinks:
+            reverse = {}
+            for source, dests in edges.items():
+                for dest in dests:
+                    reverse.setdefault(dest, set()).add(source)
+            alive = set(self.final_states)
+            stack = list(alive)
+            while stack:
+                for source in reverse.get(stack.pop(), ()):
+                    if source not in alive:
+                        alive.add(source)
+                        stack.append(source)
+            visible &= alive | {self.starting_state}
+
+        if center is not None:
+            neighbours = {}
+            for source, dests in edges.items():
+                for dest in dests:
+                    neighbours.setdefault(source, set()).add(dest)
+                    neighbours.setdefault(dest, set()).add(source)
+            near = {center}
+            frontier = [center]
+            for _ in range(depth):
+                frontier = [state for current in frontier for state in neighbours.get(current, ())
+                            if state in visible and state not in near]
+                near.update(frontier)
+            visible &= near
+
+        order = {symbol: i for i, symbol in enumerate(self.alphabet)}
+        states = [state for state in self.states if state in visible]
+        labelled = {}
+        for state in states:
+            labelled[state] = []
+            for dest, symbols in edges[state].items():
+                if dest not in visible:
+                    continue
+                symbols = sorted(symbols, key=lambda symbol: order.get(symbol, len(order)))
+                label = self._ranges(symbols, order) if collapse else ''.join(symbols)
+                labelled[state].append((dest, label))
+        return states, labelled
+
+    @staticmethod
+    def _ranges(symbols, order):
+        """
+        Compress symbols into ranges of consecutive alphabet symbols, e.g. a, b, c, x -> a-c,x
+
+        :param symbols: A list of symbols sorted by their position in the alphabet
+        :param order: A dictionary mapping symbols to their positions in the alphabet
+        :return: The compressed label
+        """
+
+        parts = []
+        i = 0
+        while i < len(symbols):
+            j = i
+            while (j + 1 < len(symbols) and symbols[j + 1] in order
+                   and order.get(symbols[j + 1]) == order.get(symbols[j], -2) + 1):
+                j += 1
+            parts.append(symbols[i] if j == i else symbols[i] + ('' if j == i + 1 else '-') + symbols[j])
+            i = j + 1
+        return ','.join(parts) if any(len(part) > 1 for part in parts) else ''.join(parts)
+
+    def to_dot(self, file, **view):
+        """
+        Write the automaton in Graphviz DOT format, edge by edge, without building a graph in memory.
+
+        :param file: A path or a writable text file handle
+        :param view: Options selecting what is rendered, see _view
+        """
+
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'w') as handle:
+                return self.to_dot(handle, **view)
+
+        states, edges = self._view(**view)
+        file.write('digraph fsa {\n    rankdir=LR;\n    __start [shape=point];\n')
+        for state in states:
+            shape = 'doublecircle' if state in self.final_states else 'circle'
+            file.write(f'    {json.dumps(str(state))} [shape={shape}];\n')
+        if self.starting_state in edges:
+            file.write(f'    __start -> {json.dumps(str(self.starting_state))};\n')
+        for source in states:
+            for dest, label in edges[source]:
+                file.write(f'    {json.dumps(str(source))} -> {json.dumps(str(dest))} [label={json.dumps(label)}];\n')
+        file.write('}\n')
+
+    def to_json(self, file, **view):
+        """
+        Write the automaton as a JSON adjacency list, state by state, without building a graph in memory:
+        {"start": ..., "final": [...], "states": {"q0": {"q2": "abc"}, ...}}
+
+        :param file: A path or a writable text file handle
+        :param view: Options selecting what is rendered, see _view
+        """
+
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'w') as handle:
+                return self.to_json(handle, **view)
+
+        states, edges = self._view(**view)
+        file.write(f'{{"start": {json.dumps(self.starting_state)}, "final": {json.dumps(list(self.final_states))}, '
+                   f'"states": {{')
+        for i, state in enumerate(states):
+            file.write(f'{", " if i else ""}{json.dumps(str(state))}: {json.dumps(dict(edges[state]))}')
+        file.write('}}\n')
+
+    def draw(self, path='graph.html', **view):
         """
         Visualize the automaton as a directed graph using PyVis and save the graph to an HTML file.
+        For large automata use the view options (or to_dot / to_json) to keep the graph small.
+
+        :param path: Path of the HTML file
+        :param view: Options selecting what is rendered, see _view
         """
 
+        from pyvis.network import Network  # Only needed for HTML output
+
         G = Network(directed=True)
+        states, edges = self._view(**view)
 
-        for state in self.states:
+        for state in states:
             color = 'blue'
             if state in self.final_states:
                 color = 'green'
             G.add_node(state, shape='circle', color=color)
 
-        # Construct labels for transitions between states
-        labels = {}
-        for (source, symbol), dest in self.delta.items():
-            if (source, dest) not in labels:
-                labels[(source, dest)] = []
-            labels[(source, dest)].append(symbol)
+        # Add edges to the graph with combined labels for the same transition
+        for source in states:
+            for dest, label in edges[source]:
+                G.add_edge(source, dest, label=label)
+
+        G.write_html(path)
+
+
+# nondeterministic finite-state automaton
+class Nfa:
+    def __init__(self, states, alphabet, delta, starting_state, final_states, max_states=None):
+        """
+        Initialize the nondeterministic finite-state automaton.
+
+        :param states: A tuple of states in the automaton
+        :param alphabet: A tuple of valid symbols (alphabet) for the automaton
+        :param delta: A dictionary representing the transition function, where the key is
+                      a (current_state, symbol) tuple, and the value is the next state or a set
+                      (or tuple) of next states. The empty symbol '' marks an epsilon move
+        :param starting_state: The initial state of the automaton
+        :param final_states: A tuple of states that are considered accepting states
+        :param max_states: Cap on the number of cached deterministic states, None means no cap.
+                           When the cache is full it is flushed and rebuilt on demand (like in RE2),
+                           so a pattern with an exponential number of subsets cannot exhaust memory
+        """
+
+        self.states = states
+        self.alphabet = alphabet
+        self.delta = delta
+        self.starting_state = starting_state
+        self.final_states = final_states
+        self.max_states = max_states
+        self.cache_flushes = 0  # How many times the deterministic state cache was flushed
+
+        self._symbols = frozenset(alphabet)
+        self._final = frozenset(final_states)
+
+        # Normalize all targets to frozensets
+        self._moves = {}
+        for (source, symbol), dest in delta.items():
+            targets = frozenset((dest,)) if isinstance(dest, str) else frozenset(dest)
+            self._moves[(source, symbol)] = self._moves.get((source, symbol), frozenset()) | targets
+
+        self._start_closure = self._closure({starting_state})
+        self._reset_cache()
+
+    def _reset_cache(self):
+        """
+        Clear the lazily built deterministic automaton, keeping only its starting state.
+        Subsets of states are numbered as they are visited; _transitions[subset] maps symbols
+        to the next subset and _accepting[subset] tells whether the subset contains a final state.
+        """
+
+        self._subsets = []
+        self._subset_index = {}
+        self._transitions = []
+        self._accepting = []
+        self._start = self._subset(self._start_closure)
+
+    def _closure(self, states):
+        """
+        Compute the epsilon closure of a set of states.
+
+        :param states: An iterable of states
+        :return: A frozenset of all states reachable through epsilon moves
+        """
+
+        closure = set(states)
+        stack = list(closure)
+        while stack:
+            for dest in self._moves.get((stack.pop(), ''), ()):
+                if dest not in closure:
+                    closure.add(dest)
+                    stack.append(dest)
+        return frozenset(closure)
+
+    def _subset(self, states):
+        """
+        Get the number of a deterministic state (a subset of states), registering it on first visit.
+
+        :param states: A frozenset of states
+        :return: Number of the deterministic state
+        """
+
+        index = self._subset_index.get(states)
+        if index is None:
+            index = len(self._subsets)
+            self._subsets.append(states)
+            self._subset_index[states] = index
+            self._transitions.append({})
+            self._accepting.append(not states.isdisjoint(self._final))
+        return index
+
+    def step(self, subset, symbol):
+        """
+        Compute (and memoize) the deterministic transition from a subset for a symbol.
+
+        If the cache is full, it is flushed before the next subset is registered - subset numbers
+        obtained earlier are invalid afterwards, only the returned one can be used.
+
+        :param subset: Number of the deterministic state
+        :param symbol: The symbol read
+        :return: Number of the next deterministic state
+        """
+
+        dest = self._transitions[subset].get(symbol)
+        if dest is not None:
+            return dest
+
+        targets = set()
+        for state in self._subsets[subset]:
+            targets |= self._moves.get((state, symbol), frozenset())
+        targets = self._closure(targets)
+
+        if (self.max_states is not None and targets not in self._subset_index
+                and len(self._subsets) >= self.max_states):
+            self.cache_flushes += 1
+            self._reset_cache()
+            return self._subset(targets)
+
+        dest = self._subset(targets)
+        self._transitions[subset][symbol] = dest
+        return dest
+
+    def accepts(self, inp):
+        """
+        Check whether the input string is accepted, building deterministic states only as they are needed.
+        Already built transitions are followed with a single dictionary lookup per symbol.
+
+        :param inp: The input string to check
+        :return: True if the input is accepted, False otherwise
+        """
+
+        subset = self._start
+        for symbol in str(inp):
+            dest = self._transitions[subset].get(symbol)
+            if dest is None:
+                if symbol not in self._symbols:
+                    return False
+                dest = self.step(subset, symbol)
+            subset = dest
+        return self._accepting[subset]
+
+    def to_fsa(self):
+        """
+        Run the full subset construction and return the equivalent deterministic automaton.
+        Deterministic states are named d0, d1, ... in the order they are discovered;
+        the empty subset is left out, so the transitions into it become missing transitions.
+        The cache cap is ignored while the construction runs.
+
+        :return: An equivalent Fsa
+        """
+
+        max_states, self.max_states = self.max_states, None
+        try:
+            empty = self._subset(frozenset())
+            queue = deque([self._start])
+            seen = {self._start}
+            while queue:
+                subset = queue.popleft()
+                for symbol in self.alphabet:
+                    dest = self.step(subset, symbol)
+                    if dest not in seen:
+                        seen.add(dest)
+                        queue.append(dest)
+        finally:
+            self.max_states = max_states
+
+        seen.discard(empty)
+        order = sorted(seen)
+        names = {subset: f'd{i}' for i, subset in enumerate(order)}
+        delta = {(names[subset], symbol): names[self._transitions[subset][symbol]]
+                 for subset in order for symbol in self.alphabet
+                 if self._transitions[subset][symbol] != empty}
+        final_states = tuple(names[subset] for subset in order if self._accepting[subset])
+        return Fsa(tuple(names[subset] for subset in order), self.alphabet, delta, names[self._start], final_states)
+
+
+# regular expression compiled to a (lazily determinized) nondeterministic automaton
+class Regex:
+    def __init__(self, pattern, alphabet=tuple(string.printable), max_states=10000):
+        """
+        Compile a regular expression using Thompson's construction.
+
+        Supported syntax: concatenation, alternation (a|b), grouping ((ab)), repetition (a*, a+, a?),
+        any symbol (.), character classes ([abc], [a-z], [^0-9]) and escapes (\\*, \\|, ...).
+
+        :param pattern: The regular expression
+        :param alphabet: A tuple of valid symbols, '.' and negated classes are taken relative to it
+        :param max_states: Cap on the number of cached deterministic states, see Nfa
+        """
+
+        self.pattern = pattern
+        self.alphabet = tuple(alphabet)
+        self._pos = 0
+        self._count = 0
+        self._delta = {}
+
+        start, end = self._alternation()
+        if self._pos != len(pattern):
+            raise ValueError(f'Unexpected {pattern[self._pos]!r} at position {self._pos} in {pattern!r}')
+
+        states = tuple(f'r{i}' for i in range(self._count))
+        self.nfa = Nfa(states, self.alphabet, self._delta, start, (end,), max_states)
 
-        # Add edges to the graph with corresponding labels
-        for (source, dest), symbols in labels.items():
-            temp = ''.join(symbols)  # Combine symbols for the same transition
-            G.add_edge(source, dest, label=temp)
+        # Unanchored search - the extra starting state loops on every symbol
+        search_delta = dict(self._delta)
+        search_delta[('rs', '')] = {start}
+        for symbol in self.alphabet:
+            search_delta[('rs', symbol)] = {'rs'}
+        self.search_nfa = Nfa(states + ('rs',), self.alphabet, search_delta, 'rs', (end,), max_states)
 
-        G.write_html("graph.html")
+    def _state(self):
+        """
+        Create a new automaton state.
+
+        :return: Name of the new state
+        """
+
+        self._count += 1
+        return f'r{self._count - 1}'
+
+    def _edge(self, source, symbol, dest):
+        """
+        Add a transition to the automaton, '' marks an epsilon move.
+        """
+
+        self._delta.setdefault((source, symbol), set()).add(dest)
+
+    def _peek(self):
+        """
+        Get the next symbol of the pattern without consuming it, None at the end of the pattern.
+        """
+
+        return self.pattern[self._pos] if self._pos < len(self.pattern) else None
+
+    def _alternation(self):
+        """
+        alternation := concatenation ('|' concatenation)*
+
+        :return: A (start, end) pair of states of the fragment
+        """
+
+        branches = [self._concatenation()]
+        while self._peek() == '|':
+            self._pos += 1
+            branches.append(self._concatenation())
+        if len(branches) == 1:
+            return branches[0]
+
+        start, end = self._state(), self._state()
+        for branch_start, branch_end in branches:
+            self._edge(start, '', branch_start)
+            self._edge(branch_end, '', end)
+        return start, end
+
+    def _concatenation(self):
+        """
+        concatenation := repetition*
+
+        :return: A (start, end) pair of states of the fragment
+        """
+
+        start = end = self._state()
+        while self._peek() not in (None, '|', ')'):
+            atom_start, atom_end = self._repetition()
+            self._edge(end, '', atom_start)
+            end = atom_end
+        return start, end
+
+    def _repetition(self):
+        """
+        repetition := atom ('*' | '+' | '?')*
+
+        :return: A (start, end) pair of states of the fragment
+        """
+
+        start, end = self._atom()
+        while self._peek() in ('*', '+', '?'):
+            operator = self.pattern[self._pos]
+            self._pos += 1
+            new_start, new_end = self._state(), self._state()
+            self._edge(new_start, '', start)
+            self._edge(end, '', new_end)
+            if operator in ('*', '?'):
+                self._edge(new_start, '', new_end)
+            if operator in ('*', '+'):
+                self._edge(end, '', start)
+            start, end = new_start, new_end
+        return start, end
+
+    def _atom(self):
+        """
+        atom := '(' alternation ')' | '[' class ']' | '.' | '\\' symbol | symbol
+
+        :return: A (start, end) pair of states of the fragment
+        """
+
+        symbol = self._peek()
+        if symbol is None or symbol in '*+?':
+            raise ValueError(f'Missing operand at position {self._pos} in {self.pattern!r}')
+        self._pos += 1
+
+        if symbol == '(':
+            fragment = self._alternation()
+            if self._peek() != ')':
+                raise ValueError(f'Missing closing parenthesis in {self.pattern!r}')
+            self._pos += 1
+            return fragment
+
+        if symbol == '[':
+            symbols = self._class()
+        elif symbol == '.':
+            symbols = self.alphabet
+        else:
+            if symbol == '\\':
+                if self._peek() is None:
+                    raise ValueError(f'Dangling escape in {self.pattern!r}')
+                symbol = self.pattern[self._pos]
+                self._pos += 1
+            symbols = (symbol,)
+
+        start, end = self._state(), self._state()
+        for symbol in symbols:
+            if symbol in self.alphabet:
+                self._edge(start, symbol, end)
+        return start, end
+
+    def _class(self):
+        """
+        Parse the inside of a character class, the opening '[' is already consumed.
+
+        :return: A tuple of symbols matched by the class
+        """
+
+        negated = self._peek() == '^'
+        if negated:
+            self._pos += 1
+
+        symbols = set()
+        first = True
+        while self._peek() is not None and (self._peek() != ']' or first):
+            low = self.pattern[self._pos]
+            if low == '\\' and self._pos + 1 < len(self.pattern):
+                self._pos += 1
+                low = self.pattern[self._pos]
+            self._pos += 1
+            first = False
+
+            # Range like a-z, a trailing '-' is a literal
+            if self._peek() == '-' and self._pos + 1 < len(self.pattern) and self.pattern[self._pos + 1] != ']':
+                high = self.pattern[self._pos + 1]
+                self._pos += 2
+                symbols |= {chr(i) for i in range(ord(low), ord(high) + 1)}
+            else:
+                symbols.add(low)
+
+        if self._peek() != ']':
+            raise ValueError(f'Missing closing bracket in {self.pattern!r}')
+        self._pos += 1
+
+        if negated:
+            return tuple(symbol for symbol in self.alphabet if symbol not in symbols)
+        return tuple(symbol for symbol in self.alphabet if symbol in symbols)
+
+    def fullmatch(self, inp):
+        """
+        Check whether the whole input string matches the pattern.
+
+        :param inp: The input string
+        :return: True if the input matches, False otherwise
+        """
+
+        return self.nfa.accepts(inp)
+
+    def search(self, inp):
+        """
+        Check whether any substring of the input matches the pattern.
+        Stops at the end of the earliest match.
+
+        :param inp: The input string
+        :return: True if the pattern occurs in the input, False otherwise
+        """
+
+        nfa = self.search_nfa
+        subset = nfa._start
+        if nfa._accepting[subset]:
+            return True
+        for symbol in str(inp):
+            dest = nfa._transitions[subset].get(symbol)
+            if dest is None:
+                if symbol not in nfa._symbols:
+                    # A symbol outside the alphabet cannot be a part of a match, start over after it
+                    subset = nfa._start
+                    continue
+                dest = nfa.step(subset, symbol)
+            subset = dest
+            if nfa._accepting[subset]:
+                return True
+        return False
+
+    def to_fsa(self):
+        """
+        Compile the pattern to a minimal Fsa, so the compiled table, batch and file scanning can be used.
+
+        :return: An Fsa accepting exactly the strings fully matching the pattern
+        """
+
+        return self.nfa.to_fsa().minimize()
 
 
 # Example usage of the finite-state automaton:
-states = ('q0', 'q1', 'q2', 'q3', 'q4', 'q5', 'q6')
-alphabet = ('a', 'b', 'c')
-delta = {
-        ('q0', 'a'): 'q2',
-        ('q0', 'b'): 'q2',
-        ('q0', 'c'): 'q2',
-        ('q2', 'a'): 'q1',
-        ('q2', 'b'): 'q1',
-        ('q2', 'c'): 'q6',
-        ('q1', 'a'): 'q4',
-        ('q1', 'b'): 'q0',
-        ('q1', 'c'): 'q3',
-        ('q3', 'a'): 'q3',
-        ('q3', 'b'): 'q3',
-        ('q3', 'c'): 'q3',
-        ('q4', 'a'): 'q0',
-        ('q4', 'b'): 'q5',
-        ('q4', 'c'): 'q5',
-        ('q5', 'a'): 'q4',
-        ('q5', 'b'): 'q4',
-        ('q5', 'c'): 'q4',
-        ('q6', 'a'): 'q3',
-        ('q6', 'b'): 'q3',
-        ('q6', 'c'): 'q3'
-}
-starting_state = 'q0'
-final_states = ('q0', 'q4', 'q5')
-
-automaton = Fsa(states, alphabet, delta, starting_state, final_states)
-automaton.check_input('abc')
-automaton.check_input('123')
-automaton.check_input('cba')
-automaton.draw()
+if __name__ == '__main__':
+    states = ('q0', 'q1', 'q2', 'q3', 'q4', 'q5', 'q6')
+    alphabet = ('a', 'b', 'c')
+    delta = {
+            ('q0', 'a'): 'q2',
+            ('q0', 'b'): 'q2',
+            ('q0', 'c'): 'q2',
+            ('q2', 'a'): 'q1',
+            ('q2', 'b'): 'q1',
+            ('q2', 'c'): 'q6',
+            ('q1', 'a'): 'q4',
+            ('q1', 'b'): 'q0',
+            ('q1', 'c'): 'q3',
+            ('q3', 'a'): 'q3',
+            ('q3', 'b'): 'q3',
+            ('q3', 'c'): 'q3',
+            ('q4', 'a'): 'q0',
+            ('q4', 'b'): 'q5',
+            ('q4', 'c'): 'q5',
+            ('q5', 'a'): 'q4',
+            ('q5', 'b'): 'q4',
+            ('q5', 'c'): 'q4',
+            ('q6', 'a'): 'q3',
+            ('q6', 'b'): 'q3',
+            ('q6', 'c'): 'q3'
+    }
+    starting_state = 'q0'
+    final_states = ('q0', 'q4', 'q5')
+
+    automaton = Fsa(states, alphabet, delta, starting_state, final_states)
+    automaton.check_input('abc')
+    automaton.check_input('123')
+    automaton.check_input('cba')
+    print(automaton.accepts('abc'), automaton.accepts('123'))
+    print(automaton.accepts_many(['abc', '123', 'cba', 'aaa', '']))
+
+    # Scanning a file in parallel chunks, then only the appended part of it
+    with open('input.txt', 'w') as file:
+        file.write('abcabc' * 100000)
+    scan = automaton.scan_file('input.txt', chunk_size=1 << 16)
+    with open('input.txt', 'a') as file:
+        file.write('aa')
+    scan = automaton.scan_file('input.txt', chunk_size=1 << 16, resume=scan)
+    print(automaton.accepts_mapping(scan[0]), automaton.accepts('abcabc' * 100000 + 'aa'))
+
+    # Minimal equivalent automaton - the sinks q3, q6 are dropped
+    minimal = automaton.minimize()
+    print(minimal.states, minimal.final_states)
+
+    # Nondeterministic automaton accepting words over {a, b} ending with 'ab', with an epsilon move
+    nfa = Nfa(('p0', 'p1', 'p2', 'p3'), ('a', 'b'),
+              {('p0', 'a'): {'p0', 'p1'}, ('p0', 'b'): 'p0', ('p1', ''): 'p2', ('p2', 'b'): 'p3'},
+              'p0', ('p3',))
+    print(nfa.accepts('abab'), nfa.accepts('aba'))
+    dfa = nfa.to_fsa().minimize()
+    print(dfa.states, dfa.accepts('abab'), dfa.accepts('aba'))
+
+    # Regular expressions matched by a lazily built, size-capped deterministic automaton
+    regex = Regex('(a|b)*c[0-9]+', max_states=100)
+    print(regex.fullmatch('abbac42'), regex.fullmatch('abc'), regex.search('xx ac7 yy'))
+    print(regex.to_fsa().accepts_many(['ac1', 'bbc', 'c99']))
+
+    # Streamed exports, with parallel edges merged into ranges and sink states hidden
+    automaton.to_dot('graph.dot', collapse=True, hide_sinks=True)
+    automaton.to_json('graph.json', center='q1', depth=1)
+
+    automaton.draw()
@@ -1,8 +1,11 @@
-import math
-import random
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+from qmc import make_points
+from quadrature import gauss_kronrod
+
 def plot_mc(points, f, func_string):
     x_vals_green = [point[0] for point in points if point[2] == 'green']
     y_vals_green = [point[1] for point in points if point[2] == 'green']
@@ -31,37 +34,244 @@ def plot_mc(points, f, func_string):
     plt.grid(True)
     plt.show()
 
+# Renders the density histograms filled by monte_carlo (hist=...) as three layered images, with the opacity
+# of every cell following the log of its sample count - so the cost depends on the resolution, not on n.
+def plot_mc_density(hist, f, func_string, maxv, minv):
+    plt.figure(figsize=(10, 6))
+    layers = [(0, (1.0, 0.0, 0.0), 'Below curve (red)'),
+              (1, (0.5, 0.5, 0.5), 'Other (grey)'),
+              (2, (0.0, 0.5, 0.0), 'Under curve (green)')]
+    for index, rgb, label in layers:
+        density = np.log1p(hist[index].astype(float))
+        image = np.zeros(hist[index].shape + (4,))
+        image[..., :3] = rgb
+        image[..., 3] = density / density.max() if density.max() > 0 else 0
+        plt.imshow(image, extent=(0, 1, minv, maxv), origin='lower', aspect='auto', interpolation='nearest')
+        plt.scatter([], [], color=rgb, s=20, label=label)
+
+    x_func = np.linspace(0, 1, 1000)
+    plt.plot(x_func, f(x_func), color='blue', linewidth=2, label=func_string)
+
+    plt.title('Monte Carlo Simulation')
+    plt.xlabel('x')
+    plt.ylabel('y')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
 def f(x):
-    return math.exp(-2 * x) - 0.5
+    return np.exp(-2 * x) - 0.5
 
+# Left-endpoint Riemann sum evaluated on a single grid, see quadrature.py for the accurate rules
 def riemann_integral(n, f):
-    area = 0
-    for i in range(n):
-        area += f(i * (1 / n)) * (1 / n)
-    return area
+    return f(np.arange(n) / n).sum() / n
+
+# Draws and classifies one chunk of samples with its own random stream, or - if a point generator
+# (see qmc.py) is given - with the points start, ..., start + size - 1 of its low-discrepancy sequence.
+# Returns the sample points, their colors (1 - green, -1 - red, 0 - grey) and the hit counter
+# (the sum of colors) together with the sum of squared colors, used for the variance.
+def mc_chunk(f, maxv, minv, size, seed, points=None, start=0):
+    if points is None:
+        rng = np.random.default_rng(seed)
+        rx = rng.uniform(0, 1, size)
+        ry = rng.uniform(minv, maxv, size)
+    else:
+        u = points.block(start, size)
+        rx = u[:, 0]
+        ry = minv + (maxv - minv) * u[:, 1]
+    fv = f(rx)
+    green = (fv >= ry) & (ry >= 0)
+    red = (fv < ry) & (ry < 0)
+    color = green.astype(np.int8) - red.astype(np.int8)
+    hit = int(np.count_nonzero(green)) - int(np.count_nonzero(red))
+    hit2 = int(np.count_nonzero(green)) + int(np.count_nonzero(red))
+    return rx, ry, color, hit, hit2
 
-def monte_carlo(n, f, maxv, minv):
-    shoot = 0
+# Adds a chunk of classified samples to the density histograms hist of shape (3, ny, nx) -
+# hist[0] counts red, hist[1] grey and hist[2] green samples in every cell of the [0, 1] x [minv, maxv] box.
+def mc_hist_add(hist, rx, ry, color, maxv, minv):
+    _, ny, nx = hist.shape
+    ix = np.minimum((rx * nx).astype(np.int64), nx - 1)
+    iy = np.minimum(((ry - minv) / (maxv - minv) * ny).astype(np.int64), ny - 1)
+    cells = ((color.astype(np.int64) + 1) * ny + iy) * nx + ix
+    hist += np.bincount(cells, minlength=hist.size).reshape(hist.shape)
+
+def mc_chunk_counts(args):
+    chunk_args, hist_shape = args
+    rx, ry, color, hit, hit2 = mc_chunk(*chunk_args)
+    hist = None
+    if hist_shape is not None:
+        hist = np.zeros(hist_shape, dtype=np.int64)
+        mc_hist_add(hist, rx, ry, color, chunk_args[1], chunk_args[2])
+    return hit, hit2, hist
+
+# Every chunk of chunk_size samples gets its own stream spawned from one SeedSequence,
+# so the samples depend only on the seed and chunk_size - not on how the chunks are distributed.
+def chunk_seeds(n, chunk_size, seed):
+    seed_seq = np.random.SeedSequence(seed)
+    sizes = [min(chunk_size, n - i) for i in range(0, n, chunk_size)]
+    return seed_seq, list(zip(sizes, seed_seq.spawn(len(sizes))))
+
+# Area and its standard error from the merged counters. Every sample contributes a color c in {-1, 0, 1}
+# and the area is (maxv - minv) * mean(c).
+def mc_estimate(n, hit, hit2, maxv, minv):
+    mean = hit / n
+    var = max(hit2 / n - mean ** 2, 0) * n / max(n - 1, 1)
+    return mean * (maxv - minv), float((maxv - minv) * np.sqrt(var / n))
+
+# Draws and classifies the n samples in chunks of chunk_size, with f evaluated on whole arrays,
+# so memory does not depend on n. Only the hit counters are kept, plus a uniform reservoir sample
+# of at most `sample` points (in the (x, y, color) format of plot_mc) for plotting.
+# sequence - None for pseudo-random points, 'sobol' or 'halton' for scrambled low-discrepancy points.
+# hist - optional int64 array of shape (3, ny, nx), the samples are binned into it (see mc_hist_add)
+# while sampling runs, for plot_mc_density.
+def monte_carlo(n, f, maxv, minv, chunk_size=1 << 20, sample=10000, seed=None, sequence=None, hist=None):
+    seed_seq, chunks = chunk_seeds(n, chunk_size, seed)
+    points = None if sequence is None else make_points(sequence, 2, seed)
+    rng = np.random.default_rng(seed_seq.spawn(1)[0])  # Separate stream for the reservoir
     hit = 0
-    points = []
-    for i in range(n):
-        rx = random.uniform(0, 1)
-        ry = random.uniform(minv, maxv)
-        fv = f(rx)
-        if fv >= ry and ry >= 0:
-            hit += 1
-            points.append((rx, ry, 'green'))
-        elif fv < ry and ry < 0:
-            hit -= 1
-            points.append((rx, ry, 'red'))
-        else:
-            points.append((rx, ry, 'grey'))
-        shoot += 1
-    area = (hit / shoot) * (maxv - minv)
+    res_x = np.empty(min(sample, n))
+    res_y = np.empty(min(sample, n))
+    res_c = np.empty(min(sample, n), dtype=np.int8)
+    done = 0
+    for size, chunk_seed in chunks:
+        rx, ry, color, chunk_hit, _ = mc_chunk(f, maxv, minv, size, chunk_seed, points, done)
+        hit += chunk_hit
+        if hist is not None:
+            mc_hist_add(hist, rx, ry, color, maxv, minv)
+
+        # Reservoir sampling - fill the reservoir first, then every next sample j replaces
+        # a random slot with probability sample / (j + 1)
+        fill = max(0, min(sample - done, size))
+        res_x[done:done + fill], res_y[done:done + fill], res_c[done:done + fill] = rx[:fill], ry[:fill], color[:fill]
+        if fill < size and sample:
+            slot = rng.integers(0, np.arange(done + fill, done + size) + 1)
+            keep = slot < sample
+            res_x[slot[keep]], res_y[slot[keep]], res_c[slot[keep]] = rx[fill:][keep], ry[fill:][keep], color[fill:][keep]
+        done += size
+    area = (hit / n) * (maxv - minv)
+    colors = {1: 'green', -1: 'red', 0: 'grey'}
+    points = [(x, y, colors[c]) for x, y, c in zip(res_x.tolist(), res_y.tolist(), res_c.tolist())]
     return area, points
 
-n = 100000
-print(riemann_integral(n, f))
-area, points = monte_carlo(n, f, 0.5, -0.5)
-print(area)
-plot_mc(points, f, 'f(x) = exp(-2x) - 0.5')
+# Parallel version of monte_carlo - the chunks are spread across a process pool and only the integer
+# counters are sent back and merged, so for a given seed (and chunk_size) the result is bit-identical
+# for any number of workers, and equal to the area returned by monte_carlo.
+# f has to be picklable (defined at module level). Returns the area and its standard error.
+# With a sequence, every worker generates its own disjoint segment of the low-discrepancy sequence.
+# hist - optional density histograms, as in monte_carlo.
+def monte_carlo_parallel(n, f, maxv, minv, workers=None, chunk_size=1 << 20, seed=None, sequence=None, hist=None):
+    _, chunks = chunk_seeds(n, chunk_size, seed)
+    points = None if sequence is None else make_points(sequence, 2, seed)
+    hist_shape = None if hist is None else hist.shape
+    jobs = [((f, maxv, minv, size, chunk_seed, points, i * chunk_size), hist_shape)
+            for i, (size, chunk_seed) in enumerate(chunks)]
+    hit = hit2 = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_hit, chunk_hit2, chunk_hist in pool.map(mc_chunk_counts, jobs):
+            hit += chunk_hit
+            hit2 += chunk_hit2
+            if hist is not None:
+                hist += chunk_hist
+    return mc_estimate(n, hit, hit2, maxv, minv)
+
+# Merges the running (count, mean, M2) accumulators with a batch of values - Chan's parallel variance update.
+def merge_moments(count, mean, m2, values):
+    b_count = values.shape[0]
+    b_mean = float(values.mean())
+    b_m2 = float(((values - b_mean) ** 2).sum())
+    total = count + b_count
+    delta = b_mean - mean
+    return total, mean + delta * b_count / total, m2 + b_m2 + delta ** 2 * count * b_count / total
+
+# Draws one batch of i.i.d. values whose mean estimates the integral of f over [0, 1]:
+# - 'mean' - mean-value sampling, f(x) for uniform x
+# - 'antithetic' - (f(x) + f(1 - x)) / 2, each value uses two evaluations of f
+# - 'stratified' - [0, 1] is split into `batch` strata with one uniform point in each, and the whole batch
+#   gives a single value (the mean over strata), so the variance is estimated across batches
+# - 'importance' - f(x) / pdf(x) for x drawn from the proposal (sample, pdf), where sample(rng, size)
+#   draws points and pdf(x) is their density, which should roughly follow |f|
+# Returns the values and the number of evaluations of f used.
+def mc_batch(f, method, batch, rng, proposal=None):
+    if method == 'mean':
+        return f(rng.uniform(0, 1, batch)), batch
+    if method == 'antithetic':
+        x = rng.uniform(0, 1, batch // 2)
+        return (f(x) + f(1 - x)) / 2, 2 * (batch // 2)
+    if method == 'stratified':
+        x = (np.arange(batch) + rng.uniform(0, 1, batch)) / batch
+        return np.array([f(x).mean()]), batch
+    if method == 'importance':
+        sample, pdf = proposal
+        x = sample(rng, batch)
+        inside = (x >= 0) & (x <= 1)
+        return np.where(inside, f(np.clip(x, 0, 1)) / pdf(x), 0), batch
+    raise ValueError(f'Unknown method {method}')
+
+# Estimates the integral of f over [0, 1] with a variance reduction method (see mc_batch).
+# With tol, batches are drawn until the standard error is at most tol (or max_n evaluations are used),
+# otherwise about n evaluations are used. f has to accept arrays.
+# Returns the estimate, its standard error, the confidence interval at level z (1.96 - 95%)
+# and the number of evaluations of f.
+def mc_integrate(f, n=100000, method='mean', tol=None, batch=1 << 14, max_n=10 ** 9, proposal=None, z=1.96,
+                 seed=None):
+    rng = np.random.default_rng(seed)
+    count, mean, m2 = 0, 0.0, 0.0
+    used = 0
+    stderr = np.inf
+    while True:
+        values, evaluations = mc_batch(f, method, batch, rng, proposal)
+        count, mean, m2 = merge_moments(count, mean, m2, values)
+        used += evaluations
+        if count > 1:
+            stderr = float(np.sqrt(m2 / (count - 1) / count))
+        if tol is None and used >= n:
+            break
+        if tol is not None and ((count > 1 and stderr <= tol) or used >= max_n):
+            break
+    return mean, stderr, (mean - z * stderr, mean + z * stderr), used
+
+# Randomized quasi-Monte Carlo estimate of the integral of f over [0, 1]. The n evaluations are split
+# between independently scrambled replicates of the sequence ('sobol' or 'halton'), evaluated in blocks
+# of chunk_size points; the spread of the replicate estimates gives the standard error.
+# Returns the estimate, its standard error, the confidence interval at level z and the number of evaluations.
+def qmc_integrate(f, n=2 ** 16, sequence='sobol', replicates=16, chunk_size=1 << 20, z=1.96, seed=None):
+    per_replicate = n // replicates
+    estimates = []
+    for replicate_seed in np.random.SeedSequence(seed).spawn(replicates):
+        points = make_points(sequence, 1, replicate_seed)
+        total = 0.0
+        for start in range(0, per_replicate, chunk_size):
+            total += float(f(points.block(start, min(chunk_size, per_replicate - start))[:, 0]).sum())
+        estimates.append(total / per_replicate)
+    estimates = np.array(estimates)
+    mean = float(estimates.mean())
+    stderr = float(estimates.std(ddof=1) / np.sqrt(replicates))
+    return mean, stderr, (mean - z * stderr, mean + z * stderr), per_replicate * replicates
+
+if __name__ == '__main__':
+    n = 100000
+    print(riemann_integral(n, f))
+    print(gauss_kronrod(f, 0, 1))
+    area, points = monte_carlo(n, f, 0.5, -0.5)
+    print(area)
+    print(monte_carlo_parallel(10 ** 7, f, 0.5, -0.5, seed=42))
+
+    # Variance reduction - evaluations of f needed for a standard error of 1e-4
+    exp_proposal = (lambda rng, size: -np.log(1 - rng.uniform(0, 1 - np.exp(-2), size)) / 2,
+                    lambda x: 2 * np.exp(-2 * x) / (1 - np.exp(-2)))
+    for method in ('mean', 'antithetic', 'stratified'):
+        print(method, mc_integrate(f, method=method, tol=1e-4, seed=1))
+    print('importance', mc_integrate(lambda x: np.exp(-2 * x), method='importance', proposal=exp_proposal,
+                                     tol=1e-4, seed=1))
+
+    # Quasi-Monte Carlo - scrambled low-discrepancy points converge much faster on smooth integrands
+    print('sobol', qmc_integrate(f, 2 ** 16, 'sobol', seed=1))
+    print('halton', qmc_integrate(f, 2 ** 16, 'halton', seed=1))
+    print(monte_carlo(n, f, 0.5, -0.5, seed=1, sequence='sobol')[0])
+    plot_mc(points, f, 'f(x) = exp(-2x) - 0.5')
+
+    # Density rendering - 10^8 samples binned into 300 x 400 cells, without storing any points
+    hist = np.zeros((3, 300, 400), dtype=np.int64)
+    print(monte_carlo_parallel(10 ** 8, f, 0.5, -0.5, seed=42, hist=hist))
+    plot_mc_density(hist, f, 'f(x) = exp(-2x) - 0.5', 0.5, -0.5)
\ No newline at end of file
@@ -0,0 +1,131 @@
+import numpy as np
+
+# Low-discrepancy point generators for quasi-Monte Carlo integration.
+# Every generator produces points in [0, 1)^dim through block(start, size), which returns the points
+# with indexes start, ..., start + size - 1 of the sequence - so a sequence can be skipped ahead and
+# split into disjoint segments for parallel workers. A seed selects a random scrambling; differently
+# seeded generators are independent randomized replicates of the same sequence, used for error estimates.
+
+# Sobol primitive polynomials and initial direction numbers (Joe & Kuo) for dimensions 2..10, as (s, a, m)
+SOBOL_PARAMETERS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+]
+
+PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+
+BITS = 32
+
+
+# Direction numbers of one Sobol dimension, V[j] is used when bit j of the point index is set.
+# Digits are stored most significant first - bit BITS - 1 is the first binary digit after the point.
+def sobol_directions(dimension):
+    if dimension == 0:
+        return [1 << (BITS - 1 - j) for j in range(BITS)]
+    s, a, m = SOBOL_PARAMETERS[dimension - 1]
+    v = [m[j] << (BITS - 1 - j) for j in range(s)]
+    for j in range(s, BITS):
+        value = v[j - s] ^ (v[j - s] >> s)
+        for k in range(1, s):
+            if (a >> (s - 1 - k)) & 1:
+                value ^= v[j - k]
+        v.append(value)
+    return v
+
+
+# Random linear matrix scrambling - multiplies the direction numbers by a random lower triangular binary
+# matrix with a unit diagonal, which keeps the net properties of the sequence.
+def scramble_directions(v, rng):
+    rows = []
+    for k in range(BITS):
+        mask = 1 << (BITS - 1 - k)
+        for l in range(k):
+            if rng.integers(0, 2):
+                mask |= 1 << (BITS - 1 - l)
+        rows.append(mask)
+    scrambled = []
+    for value in v:
+        digits = 0
+        for k, mask in enumerate(rows):
+            if bin(value & mask).count('1') & 1:
+                digits |= 1 << (BITS - 1 - k)
+        scrambled.append(digits)
+    return scrambled
+
+
+# Sobol sequence (up to 10 dimensions and 2^32 points). With a seed, the sequence is scrambled
+# with a random linear matrix scrambling followed by a random digital shift.
+class Sobol:
+    def __init__(self, dim, seed=None, scramble=True):
+        if not 1 <= dim <= len(SOBOL_PARAMETERS) + 1:
+            raise ValueError(f'Sobol sequence supports 1 to {len(SOBOL_PARAMETERS) + 1} dimensions')
+        self.dim = dim
+        rng = np.random.default_rng(seed)
+        directions = []
+        shifts = []
+        for d in range(dim):
+            v = sobol_directions(d)
+            if scramble:
+                v = scramble_directions(v, rng)
+            directions.append(v)
+            shifts.append(int(rng.integers(0, 1 << BITS)) if scramble else 0)
+        self.directions = np.array(directions, dtype=np.uint64).T  # (BITS, dim)
+        self.shifts = np.array(shifts, dtype=np.uint64)
+
+    def block(self, start, size):
+        index = np.arange(start, start + size, dtype=np.uint64)
+        if size and start + size > 1 << BITS:
+            raise ValueError(f'Sobol sequence has only 2^{BITS} points')
+        x = np.broadcast_to(self.shifts, (size, self.dim)).copy()
+        for j in range(BITS):
+            bit = ((index >> np.uint64(j)) & np.uint64(1)).astype(bool)
+            if not bit.any():
+                if start + size <= 1 << j:
+                    break
+                continue
+            x[bit] ^= self.directions[j]
+        return x / float(1 << BITS)
+
+
+# Halton sequence (up to 10 dimensions) - radical inverses in the first prime bases.
+# With a seed, every digit of every base is scrambled with its own random permutation.
+class Halton:
+    def __init__(self, dim, seed=None, scramble=True):
+        if not 1 <= dim <= len(PRIMES):
+            raise ValueError(f'Halton sequence supports 1 to {len(PRIMES)} dimensions')
+        self.dim = dim
+        rng = np.random.default_rng(seed)
+        self.digits = [int(np.ceil(53 / np.log2(base))) for base in PRIMES[:dim]]
+        self.permutations = [
+            np.array([rng.permutation(base) if scramble else np.arange(base) for _ in range(digits)])
+            for base, digits in zip(PRIMES[:dim], self.digits)
+        ]
+
+    def block(self, start, size):
+        index = np.arange(start, start + size, dtype=np.int64)
+        x = np.zeros((size, self.dim))
+        for d in range(self.dim):
+            base = PRIMES[d]
+            i = index.copy()
+            scale = 1.0 / base
+            for digit in range(self.digits[d]):
+                x[:, d] += self.permutations[d][digit][i % base] * scale
+                i //= base
+                scale /= base
+        return x
+
+
+# Generator by name, used by monte_carlo and qmc_integrate
+def make_points(sequence, dim, seed=None):
+    if sequence == 'sobol':
+        return Sobol(dim, seed)
+    if sequence == 'halton':
+        return Halton(dim, seed)
+    raise ValueError(f'Unknown sequence {sequence}')
@@ -1,3 +1,36 @@
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+_machine = None  # Machine shipped to a worker process by _init_worker
+
+
+def _init_worker(machine):
+    """
+    Worker process initializer - receive the compiled machine once per process.
+
+    :param machine: A compiled Turing machine
+    """
+
+    global _machine
+    _machine = machine
+
+
+def _run_input(args):
+    """
+    Worker function - run the shipped machine on a single input.
+
+    :param args: An (index, input, max_steps, timeout, block_size) tuple
+    :return: An (index, input, TuringResult) tuple
+    """
+
+    index, input, max_steps, timeout, block_size = args
+    return index, input, _machine.run(input, max_steps, block_size=block_size, timeout=timeout)
+
+
 class Turing():
     def __init__(self, states, tape_alphabet, input_alphabet, delta, starting_state, accepting_states, rejecting_states):
         """
@@ -22,6 +55,455 @@ class Turing():
         self.accepting_states = accepting_states
         self.rejecting_states = rejecting_states
 
+    def compile(self):
+        """
+        Encode the machine as integer transition tables.
+
+        States and tape symbols are numbered, and the transition for state s and symbol c is stored
+        at index s * width + c of three flat lists - next state (-1 if undefined), written symbol and
+        head move (+1 or -1). The last symbol code marks symbols outside the tape alphabet.
+
+        :return: The machine itself, so calls can be chained
+        """
+
+        names = list(self.states)
+        for state in [self.starting_state, *self.delta]:
+            if state not in names:
+                names.append(state)
+        for transitions in self.delta.values():
+            for transition in transitions.values():
+                if transition is not None and transition[0] not in names:
+                    names.append(transition[0])
+
+        symbols = list(self.tape_alphabet)
+        if '_' not in symbols:
+            symbols.append('_')
+        if len(symbols) > 255:
+            raise ValueError('The tape alphabet can have at most 255 symbols')
+
+        self._state_names = names
+        self._state_index = {state: i for i, state in enumerate(names)}
+        self._symbols = symbols
+        self._symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        self._blank = self._symbol_index['_']
+        self._invalid = len(symbols)
+        self._width = len(symbols) + 1
+
+        size = len(names) * self._width
+        self._next = [-1] * size
+        self._write = [0] * size
+        self._move = [0] * size
+        for state, transitions in self.delta.items():
+            for symbol, transition in transitions.items():
+                if transition is None or symbol not in self._symbol_index or transition[1] not in self._symbol_index:
+                    continue
+                i = self._state_index[state] * self._width + self._symbol_index[symbol]
+                self._next[i] = self._state_index[transition[0]]
+                self._write[i] = self._symbol_index[transition[1]]
+                self._move[i] = 1 if transition[2] == 'R' else -1
+
+        # A single state given as a string (like 'q6') is treated as a one-element tuple
+        accepting = (self.accepting_states,) if isinstance(self.accepting_states, str) else self.accepting_states
+        rejecting = (self.rejecting_states,) if isinstance(self.rejecting_states, str) else self.rejecting_states
+        self._accepting = [state in accepting for state in names]
+        self._halting = [state in accepting or state in rejecting for state in names]
+        self._macros = {}  # Memoized block transitions, see _macro
+        return self
+
+    def _load(self, input):
+        """
+        Encode the input onto a fresh tape.
+
+        The tape is a bytearray of symbol codes with blank margins on both sides; it doubles in size
+        whenever the head runs off either end.
+
+        :param input: The input string
+        :return: A (cells, origin) pair - the tape and the index of the first input cell in it
+        """
+
+        codes = bytes(self._symbol_index.get(symbol, self._invalid) for symbol in input)
+        margin = max(16, len(codes))
+        return bytearray([self._blank]) * margin + codes + bytearray([self._blank]) * margin, margin
+
+    def run(self, input, max_steps=None, quiet=True, block_size=None, timeout=None, trace=None):
+        """
+        Run the compiled machine on the input.
+
+        :param input: The input string to process
+        :param max_steps: Step budget, the run stops with status 'step limit' when it is exhausted.
+                          None means no limit
+        :param quiet: If False, print the state of the machine before every step
+        :param block_size: If given, run the accelerated block simulation (see _run_blocks) with
+                           blocks of this many cells. Cannot be combined with quiet=False
+        :param timeout: Time budget in seconds, the run stops with status 'time limit' when it is exceeded.
+                        None means no limit
+        :param trace: A TuringTrace recording the steps of the run, None disables recording
+        :return: A TuringResult
+        """
+
+        if not hasattr(self, '_next'):
+            self.compile()
+
+        input = str(input)
+        if block_size is not None:
+            if not quiet or trace is not None:
+                raise ValueError('The accelerated block simulation does not print or record its steps')
+            return self._run_blocks(input, max_steps, block_size, timeout)
+        if trace is not None and (trace.steps or trace.checkpoints):
+            raise ValueError('A TuringTrace records a single run, create a new one for every run')
+
+        cells, origin = self._load(input)
+        head = origin
+        state = self._state_index[self.starting_state]
+        steps = 0
+        limit = sys.maxsize if max_steps is None else max_steps
+        next_state, write, move, halting = self._next, self._write, self._move, self._halting
+        width, invalid, blank = self._width, self._invalid, self._blank
+        status = None
+
+        # The clock is only checked every few thousand steps and tape snapshots every few (trace.every) steps,
+        # both through a single comparison with check
+        deadline = None if timeout is None else time.monotonic() + timeout
+        snapshot = sys.maxsize if trace is None else 0
+        record = None if trace is None else trace._record
+        check = 0
+
+        while not halting[state]:
+            if steps >= check:
+                if steps >= snapshot:
+                    trace._checkpoint(steps, state, cells, head, origin)
+                    snapshot = steps + trace.every
+                if steps >= limit:
+                    status = 'step limit'
+                    break
+                if deadline is not None and time.monotonic() > deadline:
+                    status = 'time limit'
+                    break
+                check = min(limit, snapshot, sys.maxsize if deadline is None else steps + (1 << 14))
+            symbol = cells[head]
+            i = state * width + symbol
+            dest = next_state[i]
+            if dest < 0:
+                status = 'invalid symbol' if symbol == invalid else 'undefined'
+                break
+            if not quiet:
+                self._print_step(cells, head, state, symbol, i)
+            if record is not None:
+                record(i)
+
+            cells[head] = write[i]
+            head += move[i]
+            state = dest
+            steps += 1
+
+            # Grow the tape by doubling when the head leaves it
+            if head < 0:
+                extra = len(cells)
+                cells[0:0] = bytearray([blank]) * extra
+                head += extra
+                origin += extra
+            elif head == len(cells):
+                cells.extend(bytearray([blank]) * len(cells))
+
+        if status is None:
+            status = 'accepted' if self._accepting[state] else 'rejected'
+        if trace is not None:
+            trace.flush()
+        # Invalid symbols can only come from the input, so the original symbol is recovered from it
+        symbol = self._symbols[cells[head]] if cells[head] != invalid else input[head - origin]
+        return TuringResult(status, self._state_names[state], steps, self._decode(cells), head - origin, symbol)
+
+    def _advance(self, cells, head, origin, state, n):
+        """
+        Perform up to n steps from a given configuration, without any checks or output.
+        Used to replay a run from a checkpoint.
+
+        :param cells: The tape, modified in place
+        :param head: Index of the head in cells
+        :param origin: Index of the first input cell in cells
+        :param state: Index of the current state
+        :param n: Number of steps
+        :return: A (cells, head, origin, state) tuple after the steps
+        """
+
+        next_state, write, move, halting = self._next, self._write, self._move, self._halting
+        width, blank = self._width, self._blank
+        for _ in range(n):
+            if halting[state]:
+                break
+            i = state * width + cells[head]
+            dest = next_state[i]
+            if dest < 0:
+                break
+            cells[head] = write[i]
+            head += move[i]
+            state = dest
+            if head < 0:
+                extra = len(cells)
+                cells[0:0] = bytearray([blank]) * extra
+                head += extra
+                origin += extra
+            elif head == len(cells):
+                cells.extend(bytearray([blank]) * len(cells))
+        return cells, head, origin, state
+
+    def _macro(self, state, block, pos, limit=None):
+        """
+        Simulate the machine inside a single tape block until the head leaves it.
+
+        Results are memoized by (state, block, pos) unless a step limit is given.
+
+        :param state: Index of the current state
+        :param block: A bytes object with the block contents
+        :param pos: Position of the head inside the block
+        :param limit: Maximum number of steps to simulate, None means until the head leaves the block
+        :return: An (outcome, state, block, pos, steps) tuple, where outcome is 'left' or 'right'
+                 (the head left the block), 'halt', 'undefined', 'invalid symbol', 'loop' (the machine
+                 never leaves the block) or 'step limit'
+        """
+
+        key = (state, block, pos)
+        if limit is None and key in self._macros:
+            return self._macros[key]
+
+        next_state, write, move, halting, width = self._next, self._write, self._move, self._halting, self._width
+        cells = bytearray(block)
+        steps = 0
+        seen = set()
+        while True:
+            if halting[state]:
+                outcome = 'halt'
+                break
+            if limit is not None and steps >= limit:
+                outcome = 'step limit'
+                break
+            symbol = cells[pos]
+            i = state * width + symbol
+            dest = next_state[i]
+            if dest < 0:
+                outcome = 'invalid symbol' if symbol == self._invalid else 'undefined'
+                break
+            if limit is None:
+                configuration = (state, pos, bytes(cells))
+                if configuration in seen:
+                    outcome = 'loop'
+                    break
+                seen.add(configuration)
+
+            cells[pos] = write[i]
+            pos += move[i]
+            state = dest
+            steps += 1
+            if pos < 0 or pos == len(cells):
+                outcome = 'left' if pos < 0 else 'right'
+                break
+
+        result = (outcome, state, bytes(cells), pos, steps)
+        if limit is None:
+            self._macros[key] = result
+        return result
+
+    def _run_blocks(self, input, max_steps, block_size, timeout=None):
+        """
+        Accelerated run - block (macro machine) simulation on a run-length encoded tape.
+
+        The tape is split into blocks of block_size cells, and runs of identical blocks on both sides
+        of the head are stored as [block, count] pairs. The effect of the machine on a block - entered
+        in a given state from a given side - is computed once and memoized. When the machine leaves
+        a block in the state it entered it with, and the next run consists of the same block, the head
+        would repeat the same thing over the whole run - so the run is rewritten in one jump.
+        The final tape, step count and result are the same as for the plain run, but sweeps across
+        long runs cost a single step. Runs that provably never halt (a loop inside a block, or a sweep
+        into the blank part of the tape) stop with status 'step limit' even without a budget.
+
+        :param input: The input string
+        :param max_steps: Step budget, None means no limit
+        :param block_size: Number of cells per block
+        :param timeout: Time budget in seconds, None means no limit
+        :return: A TuringResult
+        """
+
+        k = block_size
+        codes = bytes(self._symbol_index.get(symbol, self._invalid) for symbol in input)
+        codes += bytes([self._blank]) * (-len(codes) % k or (k if not codes else 0))
+        blank = bytes([self._blank]) * k
+
+        # Stacks of runs on both sides of the current block, the last element is the nearest one
+        left = []
+        right = []
+        for i in range(len(codes) - k, 0, -k):
+            block = codes[i:i + k]
+            if right and right[-1][0] == block:
+                right[-1][1] += 1
+            else:
+                right.append([block, 1])
+
+        def push(stack, block, count):
+            if stack and stack[-1][0] == block:
+                stack[-1][1] += count
+            else:
+                stack.append([block, count])
+
+        def pop(stack):
+            if not stack:
+                return blank
+            stack[-1][1] -= 1
+            return stack[-1][0] if stack[-1][1] else stack.pop()[0]
+
+        current = codes[:k]
+        index = 0  # Index of the current block, the input starts at block 0
+        pos = 0
+        state = self._state_index[self.starting_state]
+        steps = 0
+        limit = sys.maxsize if max_steps is None else max_steps
+        unbounded = max_steps is None
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            if deadline is not None and time.monotonic() > deadline:
+                status = 'time limit'
+                break
+
+            outcome, new_state, new_block, new_pos, n = self._macro(state, current, pos)
+
+            if outcome == 'loop' and unbounded:
+                status = 'step limit'
+                break
+            # The budget runs out inside this block (a missing transition only counts if found within
+            # the budget) - simulate the remaining steps one by one
+            if (outcome == 'loop' or steps + n > limit
+                    or (outcome in ('undefined', 'invalid symbol') and steps + n >= limit)):
+                outcome, new_state, new_block, new_pos, n = self._macro(state, current, pos, limit - steps)
+                steps += n
+                state, current, pos = new_state, new_block, new_pos
+                status = 'step limit' if outcome in ('step limit', 'left', 'right') else outcome
+                if outcome in ('left', 'right'):
+                    # The last allowed step left the block, move to the neighbouring one
+                    if outcome == 'right':
+                        push(left, current, 1)
+                        current, pos, index = pop(right), 0, index + 1
+                    else:
+                        push(right, current, 1)
+                        current, pos, index = pop(left), k - 1, index - 1
+                    if self._halting[state]:
+                        status = 'halt'
+                break
+
+            steps += n
+            if outcome not in ('left', 'right'):
+                state, current, pos = new_state, new_block, new_pos
+                status = outcome
+                break
+
+            # The head leaves the block - look for a run of identical blocks the machine sweeps across
+            entered = 0 if outcome == 'right' else k - 1
+            ahead, behind = (right, left) if outcome == 'right' else (left, right)
+            repeats = 0
+            if pos == entered and new_state == state:
+                if ahead and ahead[-1][0] == current:
+                    repeats = min(ahead[-1][1], (limit - steps) // n)
+                elif not ahead and current == blank:
+                    if unbounded:
+                        state, current, pos = new_state, new_block, new_pos
+                        push(behind, current, 1)
+                        current, pos = pop(ahead), entered
+                        index += 1 if outcome == 'right' else -1
+                        status = 'step limit'
+                        break
+                    repeats = (limit - steps) // n
+                    ahead.append([blank, repeats])
+            if repeats:
+                ahead[-1][1] -= repeats
+                if not ahead[-1][1]:
+                    ahead.pop()
+                steps += repeats * n
+
+            push(behind, new_block, 1 + repeats)
+            current = pop(ahead)
+            pos = entered
+            state = new_state
+            index += (1 + repeats) if outcome == 'right' else -(1 + repeats)
+
+        if status == 'halt' or (status == 'time limit' and self._halting[state]):
+            status = 'accepted' if self._accepting[state] else 'rejected'
+
+        # Expand the runs back into cells
+        cells = bytearray()
+        for block, count in left:
+            cells += block * count
+        head = len(cells) + pos
+        cells += current
+        for block, count in reversed(right):
+            cells += block * count
+        origin = head - (index * k + pos)
+
+        symbol = self._symbols[cells[head]] if cells[head] != self._invalid else input[head - origin]
+        return TuringResult(status, self._state_names[state], steps, self._decode(cells), head - origin, symbol)
+
+    def run_many(self, inputs, max_steps=None, timeout=None, workers=None, block_size=None):
+        """
+        Run the machine on many inputs in parallel, yielding the results as they finish.
+
+        The compiled machine is sent to every worker process once. Step and time limits apply to each
+        input separately, so a single looping input cannot stall the whole batch. Every result has
+        a status: 'accepted', 'rejected', 'undefined' / 'invalid symbol' (no transition defined)
+        or 'step limit' / 'time limit' (limit exceeded).
+
+        :param inputs: An iterable of input strings
+        :param max_steps: Step budget per input, None means no limit
+        :param timeout: Time budget in seconds per input, None means no limit
+        :param workers: Number of processes, None uses all cores
+        :param block_size: If given, use the accelerated block simulation
+        :return: A generator of (index, input, TuringResult) tuples, in the order of completion
+        """
+
+        if not hasattr(self, '_next'):
+            self.compile()
+
+        jobs = ((i, str(input), max_steps, timeout, block_size) for i, input in enumerate(inputs))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            # Keep a bounded number of inputs in flight, so huge corpora are not queued all at once
+            window = 4 * (workers or os.cpu_count())
+            pending = set()
+            for job in jobs:
+                pending.add(pool.submit(_run_input, job))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def _decode(self, cells):
+        """
+        Decode the tape to a string, without the blanks on both ends.
+
+        :param cells: The tape
+        :return: Contents of the tape
+        """
+
+        symbols = self._symbols + ['?']
+        return ''.join(symbols[code] for code in cells).strip('_')
+
+    def _print_step(self, cells, head, state, symbol, i):
+        """
+        Store the current step and print it with print_state.
+        """
+
+        self.current_state = self._state_names[state]
+        self.current_symbol = self._symbols[symbol]
+        self.transition = (self._state_names[self._next[i]], self._symbols[self._write[i]],
+                           'R' if self._move[i] > 0 else 'L')
+        # Print only the used part of the tape, with a few blanks around it
+        used = [i for i, code in enumerate(cells) if code != self._blank] or [head]
+        start, end = max(0, min(used[0], head) - 2), min(len(cells), max(used[-1], head) + 3)
+        symbols = self._symbols + ['?']
+        self.tape = [symbols[code] for code in cells[start:end]]
+        self.head = ['^' if i == head else '_' for i in range(start, end)]
+        self.print_state()
+
     def print_state(self):
         """
         Print the current state of the Turing machine.
@@ -33,101 +515,244 @@ class Turing():
         print(self.head)
         print(self.tape, '\n')
 
-    def check_input(self, input):
+    def check_input(self, input, max_steps=None):
         """
         Process the input string through the Turing machine and determine whether
-        the input is accepted or rejected.
+        the input is accepted or rejected, printing every step.
 
         :param input: The input string to process
+        :param max_steps: Step budget, None means no limit
+        :return: A TuringResult
         """
 
-        input = str(input)
-        self.current_state = self.starting_state
-        self.tape = ['_' for i in range(1000)]  # Initialize the tape with blanks ('_')
-        self.head = ['_' for i in range(1000)]  # Initialize the head position indicator
-        self.head[0] = '^'  # Set the initial head position to the first cell
-        self.head_ind = 0  # Set the initial head index to the start of the tape
-
-        # Load the input onto the tape
-        for symbol in input:
-            self.tape[self.head_ind] = symbol
-            self.head_ind += 1
-        self.head_ind = 0
-
-        # Main loop to process the input until an accepting or rejecting state is reached
-        while self.current_state not in (self.accepting_states or self.rejecting_states):
-            self.current_symbol = self.tape[self.head_ind]  # Read the current symbol under the head
-
-            # Check if the symbol is valid in the tape alphabet
-            if self.current_symbol not in self.tape_alphabet:
-                print(f'\nInput is NOT accepted due to an invalid symbol - {self.current_symbol}')
-                return
-
-            # Try to fetch the transition for the current state and symbol
-            try:
-                self.transition = self.delta[self.current_state][self.current_symbol]
-            except KeyError:
-                print(f'\nInput is NOT accepted because no transition is defined from state - '
-                      f'{self.current_state}, for symbol - {self.current_symbol}')
-                return
-
-            # If no transition is found, reject the input
-            if self.transition is None:
-                print(f'\nInput is NOT accepted because no transition is defined from state - '
-                      f'{self.current_state}, for symbol - {self.current_symbol}')
-                return
-
-            self.print_state()
-
-            # Update the head position and write the symbol on the tape
-            self.head[self.head_ind] = '_'
-            self.tape[self.head_ind] = self.transition[1]
-            # Move the head left or right based on the transition direction ('R' or 'L')
-            self.head_ind += 1 if self.transition[2] == 'R' else -1
-            # if self.head_ind < 0:
-            #     self.head_ind = 0
-            self.head[self.head_ind] = '^'
-            # Update the current state to the next state from the transition
-            self.current_state = self.transition[0]
-
-        result = f'Input \'{input}\' is accepted by the Turing machine.\n' if self.current_state in self.accepting_states \
-            else f'Input \'{input}\' is NOT accepted by the Turing machine.\n'
-        print(result)
+        result = self.run(input, max_steps, quiet=False)
+
+        if result.status == 'invalid symbol':
+            print(f'\nInput is NOT accepted due to an invalid symbol - {result.symbol}')
+        elif result.status == 'undefined':
+            print(f'\nInput is NOT accepted because no transition is defined from state - '
+                  f'{result.state}, for symbol - {result.symbol}')
+        elif result.status == 'step limit':
+            print(f'\nInput is NOT accepted because the step limit of {max_steps} was reached')
+        elif result.accepted:
+            print(f'Input \'{input}\' is accepted by the Turing machine.\n')
+        else:
+            print(f'Input \'{input}\' is NOT accepted by the Turing machine.\n')
+        return result
+
+
+class TuringTrace:
+    def __init__(self, machine, every=100000, capacity=None, path=None):
+        """
+        Compact execution trace of a Turing machine run, with checkpointed replay.
+
+        Every step is stored as a single 32-bit transition index, from which the state, the read
+        and written symbols and the head move are decoded. Steps are kept in memory - all of them, or
+        only the last capacity steps in a ring buffer - or streamed to a file. A snapshot of the tape
+        is taken every `every` steps, so any step can be restored by replaying from the nearest one.
+
+        :param machine: The Turing machine being traced
+        :param every: Number of steps between tape snapshots
+        :param capacity: Keep only the last capacity steps in memory (ring buffer), None keeps all of them
+        :param path: If given, steps are written to this file instead of being kept in memory,
+                     cannot be combined with capacity
+        """
+
+        if capacity and path is not None:
+            raise ValueError('A trace is kept either in a ring buffer (capacity) or in a file (path), not both')
+
+        self.machine = machine
+        self.every = every
+        self.capacity = capacity
+        self.path = path
+        self.steps = 0  # Number of recorded steps
+        self.checkpoints = []  # (step, state, cells, head, origin) tuples
+
+        self._records = array('I', bytes(4 * capacity)) if capacity else array('I')
+        self._file = open(path, 'wb') if path is not None else None
+
+    def _record(self, i):
+        """
+        Record a step, given by its index in the transition tables.
+        """
+
+        if self.capacity:
+            self._records[self.steps % self.capacity] = i
+        else:
+            self._records.append(i)
+            if self._file is not None and len(self._records) >= 1 << 16:
+                self._records.tofile(self._file)
+                del self._records[:]
+        self.steps += 1
+
+    def _checkpoint(self, step, state, cells, head, origin):
+        """
+        Store a snapshot of the tape.
+        """
+
+        self.checkpoints.append((step, state, bytes(cells), head, origin))
+
+    def flush(self):
+        """
+        Write the buffered steps to the trace file.
+        """
+
+        if self._file is not None:
+            self._records.tofile(self._file)
+            del self._records[:]
+            self._file.flush()
+
+    def close(self):
+        """
+        Flush and close the trace file.
+        """
+
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def step(self, n):
+        """
+        Get the n-th recorded step.
+
+        :param n: Number of the step, counted from 0
+        :return: A (state, read symbol, written symbol, move) tuple
+        """
+
+        if not 0 <= n < self.steps:
+            raise IndexError(f'Step {n} was not recorded')
+
+        if self.path is not None:
+            self.flush()
+            with open(self.path, 'rb') as file:
+                file.seek(4 * n)
+                i = array('I', file.read(4))[0]
+        elif self.capacity:
+            if n < self.steps - self.capacity:
+                raise IndexError(f'Step {n} is no longer in the ring buffer')
+            i = self._records[n % self.capacity]
+        else:
+            i = self._records[n]
+
+        machine = self.machine
+        state, symbol = divmod(i, machine._width)
+        return (machine._state_names[state], machine._symbols[symbol], machine._symbols[machine._write[i]],
+                'R' if machine._move[i] > 0 else 'L')
+
+    def seek(self, n):
+        """
+        Restore the configuration of the machine after n steps, by replaying from the nearest checkpoint.
+
+        :param n: Number of steps
+        :return: A (state, tape, head) tuple - the tape without the blanks on both ends,
+                 and the head position relative to the first input cell
+        """
+
+        if not 0 <= n <= self.steps or not self.checkpoints:
+            raise IndexError(f'Step {n} is outside of the recorded run')
+
+        # Checkpoints are taken in order of steps - find the last one not after n
+        low, high = 0, len(self.checkpoints) - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.checkpoints[mid][0] <= n:
+                low = mid
+            else:
+                high = mid - 1
+        step, state, cells, head, origin = self.checkpoints[low]
+
+        cells, head, origin, state = self.machine._advance(bytearray(cells), head, origin, state, n - step)
+        return self.machine._state_names[state], self.machine._decode(cells), head - origin
+
+
+class TuringResult:
+    def __init__(self, status, state, steps, tape, head, symbol):
+        """
+        Result of a Turing machine run.
+
+        :param status: 'accepted', 'rejected', 'undefined' (no transition), 'invalid symbol', 'step limit'
+                       or 'time limit'
+        :param state: The state the machine stopped in
+        :param steps: Number of steps performed
+        :param tape: Contents of the tape, without the blanks on both ends
+        :param head: Final head position, relative to the first input cell
+        :param symbol: The symbol under the head
+        """
+
+        self.status = status
+        self.state = state
+        self.steps = steps
+        self.tape = tape
+        self.head = head
+        self.symbol = symbol
+
+    @property
+    def accepted(self):
+        """
+        Whether the machine halted in an accepting state.
+        """
+
+        return self.status == 'accepted'
+
+    def __repr__(self):
+        return f'TuringResult(status={self.status!r}, state={self.state!r}, steps={self.steps}, tape={self.tape!r})'
 
 
 # Example usage of the Turing machine:
-states = ['q0', 'q1', 'q2', 'q3', 'q4', 'q5']
-input_alphabet = ['0', '1', '_']
-tape_alphabet = ['0', '1', '_']
-delta = {
-    'qs': {'_': ('q0', '_', 'R')},
+if __name__ == '__main__':
+    states = ['q0', 'q1', 'q2', 'q3', 'q4', 'q5']
+    input_alphabet = ['0', '1', '_']
+    tape_alphabet = ['0', '1', '_']
+    delta = {
+        'qs': {'_': ('q0', '_', 'R')},
+
+        'q0': {'0': ('q0', '0', 'R'), '1': ('q0', '1', 'R'), '_': ('q1', '_', 'R')},
+
+        'q1': {'0': ('q1', '0', 'R'), '1': ('q1', '1', 'R'), '_': ('q2', '_', 'L')},
+
+        'q2': {'0': ('q2', '1', 'L'), '1': ('q3', '0', 'L'), '_': ('q5', '_', 'R')},
+
+        'q3': {'0': ('q3', '0', 'L'), '1': ('q3', '1', 'L'), '_': ('q4', '_', 'L')},
 
-    'q0': {'0': ('q0', '0', 'R'), '1': ('q0', '1', 'R'), '_': ('q1', '_', 'R')},
+        'q4': {'0': ('q0', '1', 'R'), '1': ('q4', '0', 'L'), '_': ('q0', '1', 'R')},
 
-    'q1': {'0': ('q1', '0', 'R'), '1': ('q1', '1', 'R'), '_': ('q2', '_', 'L')},
+        'q5': {'1': ('q5', '_', 'R'), '_': ('q6', '_', 'R')},
 
-    'q2': {'0': ('q2', '1', 'L'), '1': ('q3', '0', 'L'), '_': ('q5', '_', 'R')},
+        'q6': {'_': ('q6', '_', 'R')}
+    }
+    starting_state = ('qs')
+    accepting_states = ('q6')
+    rejecting_states = ()
 
-    'q3': {'0': ('q3', '0', 'L'), '1': ('q3', '1', 'L'), '_': ('q4', '_', 'L')},
+    # The Turing machine performs binary summation. The input format is:
+    # _(first binary number)_(second binary number), for example:
+    # _101_10 is correct
+    # 101_10 is not correct
+    # source for this tm - https://stackoverflow.com/questions/59045832/turing-machine-for-addition-and-comparison-of-binary-numbers
 
-    'q4': {'0': ('q0', '1', 'R'), '1': ('q4', '0', 'L'), '_': ('q0', '1', 'R')},
+    tm = Turing(states, tape_alphabet, input_alphabet, delta, starting_state, accepting_states, rejecting_states)
+    tm.check_input('_10101_1101')  # 21 + 13 = 34
+    tm.check_input('_10_1')  # 2 + 1 = 3
+    tm.check_input('10_1')  # invalid input
+    tm.check_input('abc')  # invalid symbols
 
-    'q5': {'1': ('q5', '_', 'R'), '_': ('q6', '_', 'R')},
+    # Quiet runs with a step budget
+    print(tm.run('_10101_1101'))
+    print(tm.run('_1111111111_1', max_steps=10))
 
-    'q6': {'_': ('q6', '_', 'R')}
-}
-starting_state = ('qs')
-accepting_states = ('q6')
-rejecting_states = ()
+    # Accelerated block simulation - sweeps across long runs of identical blocks are done in one jump
+    print(tm.run('_' + '1' * 200 + '_1', block_size=1))
+    print(tm.run('_' + '1' * 200 + '_1', block_size=4))
 
-# The Turing machine performs binary summation. The input format is:
-# _(first binary number)_(second binary number), for example:
-# _101_10 is correct
-# 101_10 is not correct
-# source for this tm - https://stackoverflow.com/questions/59045832/turing-machine-for-addition-and-comparison-of-binary-numbers
+    # Many inputs in parallel, with per-input limits - a machine that never halts is stopped by the time limit
+    looping = Turing(['l'], ['_', '1'], ['_', '1'], {'l': {'_': ('l', '1', 'R'), '1': ('l', '1', 'R')}}, 'l', (), ())
+    for index, input, result in tm.run_many(['_101_11', '_1_1', '10_1', 'abc'], max_steps=10000):
+        print(index, input, result.status, result.tape)
+    index, input, result = next(looping.run_many(['1'], max_steps=10 ** 12, timeout=0.5))
+    print(index, input, result.status, result.steps)
 
-tm = Turing(states, tape_alphabet, input_alphabet, delta, starting_state, accepting_states, rejecting_states)
-tm.check_input('_10101_1101')  # 21 + 13 = 34
-tm.check_input('_10_1')  # 2 + 1 = 3
-tm.check_input('10_1')  # invalid input
-tm.check_input('abc')  # invalid symbols
+    # Recording a run and going back to any of its steps
+    trace = TuringTrace(tm, every=50)
+    result = tm.run('_10101_1101', trace=trace)
+    print(trace.steps, trace.step(100), trace.seek(100), trace.seek(result.steps))
@@ -1,95 +1,237 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Pipe, Process
+from functools import lru_cache
+
 import numpy as np
-from random import choice, random, randint, uniform, sample, choices
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 
 
+rng = np.random.default_rng()
+
+# The population is an (n, r) uint8 array - one row per individual, one 0/1 gene per column.
+
+
+# Weights of the genes c_1, ..., c_(r-1): 2^2, 2^1, ..., 2^(3-(r-1)), computed once per r
+@lru_cache(maxsize=None)
+def gene_weights(r):
+    return 2.0 ** (3 - np.arange(1, r))
+
+
 # Converts a binary representation of a chromosome to its decimal equivalent.
 # The range of the function is (-8, 8). The chromosome is represented as:
 # c = [c_0, c_1, ..., c_(r-1)]
 # The decimal value is calculated as:
 # (-1)^(c_0) * (c_1 * 2^2 + c_2 * 2^1 + ... + c_(r-2) * 2^(3-(r-2)) + c_(r-1) * 2^(3-(r-1)))
+# c can also be a whole (n, r) population - then all individuals are decoded with one matrix-vector product.
 def binary_to_decimal(c):
-    sum_val = 0
-    j = 2
-    for i in c.copy()[1:]:
-        sum_val += i * (2 ** j)
-        j -= 1
-    return ((-1) ** c[0]) * sum_val
+    c = np.asarray(c)
+    return (1 - 2 * c[..., 0].astype(np.int8)) * (c[..., 1:] @ gene_weights(c.shape[-1]))
 
 
 # Creates a population of n individuals (creatures), each with r chromosomes.
 def create_population(n, r):
-    p = []
-    for _ in range(n):
-        c = []
-        for _ in range(r):
-            c.append(choice([0, 1]))
-        p.append(c)
-    return p
+    return rng.integers(0, 2, size=(n, r), dtype=np.uint8)
+
+
+# Packs every genome (row of p) into a single key - an int for r <= 64, raw bytes otherwise.
+def pack_genomes(p):
+    packed = np.packbits(p, axis=1)
+    if packed.shape[1] <= 8:
+        padded = np.zeros((len(p), 8), dtype=np.uint8)
+        padded[:, 8 - packed.shape[1]:] = packed
+        return padded.view('>u8').ravel()
+    return np.ascontiguousarray(packed).view(f'V{packed.shape[1]}').ravel()
+
+
+# Fitness memoization keyed on the genome, with LRU eviction above maxsize entries.
+# Every generation is deduplicated first, so f is called once per unique genome not found in the cache.
+# hits / misses count unique genomes found / not found in the cache, duplicates counts individuals
+# that shared a genome with another individual of the same generation.
+class FitnessCache:
+    def __init__(self, f, maxsize=100000):
+        self.f = f
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0
+        self.cache = OrderedDict()
+
+    def rate(self, p, backend='serial', pool=None):
+        keys, index, inverse = np.unique(pack_genomes(p), return_index=True, return_inverse=True)
+        self.duplicates += len(p) - len(keys)
+        keys = keys.tolist()
+        values = np.empty(len(keys))
+        missing = []
+        for k, key in enumerate(keys):
+            value = self.cache.get(key)
+            if value is None:
+                missing.append(k)
+            else:
+                self.cache.move_to_end(key)
+                values[k] = value
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        values[missing] = evaluate(self.f, binary_to_decimal(p[index[missing]]), backend, pool)
+        for k in missing:
+            self.cache[keys[k]] = values[k]
+        while len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return values[inverse.ravel()]
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'duplicates': self.duplicates,
+                'maxsize': self.maxsize, 'currsize': len(self.cache)}
+
+
+# Evaluates f on a chunk of decoded values in a worker process
+def evaluate_chunk(args):
+    f, x = args
+    return [f(v) for v in x]
+
+
+# Evaluates f on the decoded values x, returning the ratings in the same order. Backends:
+# - 'serial' - one call of f per value
+# - 'vectorized' - a single call of f on the whole array (f has to accept NumPy arrays)
+# - 'process' - the values are split into chunks evaluated on pool, a ProcessPoolExecutor
+#   (f has to be picklable, defined at module level)
+def evaluate(f, x, backend='serial', pool=None):
+    if backend == 'serial':
+        return np.array([f(v) for v in x], dtype=float)
+    if backend == 'vectorized':
+        return np.broadcast_to(np.asarray(f(x), dtype=float), x.shape).copy()
+    if backend == 'process':
+        chunks = np.array_split(x, min(len(x), 4 * os.cpu_count()) or 1)
+        return np.array([v for chunk in pool.map(evaluate_chunk, [(f, c) for c in chunks]) for v in chunk], dtype=float)
+    raise ValueError(f'Unknown backend {backend}')
 
 
 # Evaluates the population p using the fitness function f.
-def rate_population(p, f):
-    rating = [f(binary_to_decimal(i)) for i in p.copy()]
+# With a FitnessCache, only unique genomes missing from the cache are evaluated - the cache has to be built for f.
+def rate_population(p, f, cache=None, backend='serial', pool=None):
+    if cache is not None:
+        if cache.f is not f:
+            raise ValueError('The FitnessCache was built for a different fitness function')
+        return cache.rate(p, backend, pool)
+    rating = evaluate(f, binary_to_decimal(p), backend, pool)
     return rating
 
 
 # Selects with replacement n individuals from population p based on their fitness ratings.
-# Implements roulette wheel selection method.
+# Implements roulette wheel selection method, with all n spins located by one binary search.
 def select(rating, p, n):
-    weight = [(max(rating) + 1 - i) for i in rating.copy()]  # +1 ensures no zero probability
-    w = [list(item) for item in zip(weight, p)]
-    w.sort(key=lambda x: x[0], reverse=True)
-
-    # Calculate cumulative weights for rws
-    temp = 0
-    for i in range(len(w)):
-        temp += w[i][0]
-        w[i][0] = temp
-
-    popsum = w[-1][0]
-    new_candidates = []
-
-    # Selecting n new candidates using rws with binary search
-    for _ in range(n):
-        rand = uniform(0, popsum)
-        low, high = 0, len(w) - 1
-        while low < high:
-            mid = (low + high) // 2
-            if rand > w[mid][0]:
-                low = mid + 1
-            else:
-                high = mid
-        new_candidates.append(w[low][1])
-
-    return new_candidates
+    weight = rating.max() + 1 - rating  # +1 ensures no zero probability
+    cumulative = np.cumsum(weight)
+    spins = rng.uniform(0, cumulative[-1], n)
+    return p[np.minimum(np.searchsorted(cumulative, spins), len(p) - 1)]
 
 
-# Implements crossover between selected individuals based on crossover probability - cp
+# Implements two-point crossover between selected individuals based on crossover probability - cp.
+# Individuals are paired randomly, and the genes between the crossover points r1, r2 are swapped
+# in all pairs at once through a mask.
 def crossing(p, n, r, cp=0.5):
-    indexes = [i for i in range(len(p))]
+    order = rng.permutation(len(p))[:2 * (n // 2)]
+    c1, c2 = order[0::2], order[1::2]
+    pairs = c1.shape[0]
+
+    crossed = rng.random(pairs) <= cp
+    r1 = rng.integers(2, r - 1, size=pairs)
+    r2 = rng.integers(r1, r + 1)
+    genes = np.arange(r)
+    mask = crossed[:, None] & (genes >= r1[:, None]) & (genes < r2[:, None])
+
     new_population = p.copy()
-    for i in range(n // 2):
-        c1, c2 = sample(indexes, k=2)
-        indexes.remove(c1)
-        indexes.remove(c2)
-        if random() <= cp:
-            r1 = randint(2, r - 2)
-            r2 = randint(r1, r)
-            for i in range(r1, r2):
-                new_population[c1][i], new_population[c2][i] = new_population[c2][i], new_population[c1][i]
+    new_population[c1] = np.where(mask, p[c2], p[c1])
+    new_population[c2] = np.where(mask, p[c1], p[c2])
     return new_population
 
 
-# Implements mutation of the population based on mutation probability - mp
+# Implements mutation of the population based on mutation probability - mp.
+# Every gene is flipped with probability mp by XOR with a Bernoulli mask.
 def mutate(p, mp=0.01):
-    new_population = p.copy()
-    for c in new_population:
-        for i in range(len(c)):
-            if random() <= mp:
-                c[i] = 1 - c[i]
-    return new_population
+    return p ^ (rng.random(p.shape, dtype=np.float32) <= mp).astype(np.uint8)
+
+
+# History of a run, compact enough for long runs with large populations. Every recorded generation is stored
+# as an (m, ceil(r / 8)) block of packed bits (np.packbits). Storage grows with the run: in memory, the blocks
+# are kept in arrays of at most 64 populations (and about chunk_bytes) allocated one at a time, and with path
+# they are appended to a raw file which is mapped to memory for reading, so only the generations being read back
+# are loaded. The best solution and its rating are recorded in every generation.
+# n, r - population size and number of genes
+# every - only every k-th generation is recorded
+# top - only the top m individuals of a recorded generation are stored, sorted from the best
+# path - file the packed populations are appended to (uint8, shape (len(history), m, ceil(r / 8))),
+#        None keeps them in memory
+# history[i] unpacks the i-th recorded population to an (m, r) array, history.generations[i] is its generation.
+class RunHistory:
+    def __init__(self, n, r, every=1, top=None, path=None, chunk_bytes=1 << 24):
+        self.r = r
+        self.every = every
+        self.top = top
+        self.path = path
+        self.shape = (n if top is None else min(top, n), (r + 7) // 8)  # Shape of one packed population
+        # Populations per in-memory array - at most 64, and at most about chunk_bytes
+        self.chunk = max(1, min(64, chunk_bytes // (self.shape[0] * self.shape[1])))
+        self.chunks = []
+        self.file = open(path, 'wb') if path is not None else None
+        self.mapped = None  # Memory map of the file, reopened when it has grown
+        self.generations = []
+        self.best_x = []
+        self.best_rating = []
+        self.recorded = 0  # Number of stored populations
+        self.length = 0  # Number of generations seen
+
+    def record(self, p, rating, indbest):
+        generation = self.length
+        self.best_x.append(float(binary_to_decimal(p[indbest])))
+        self.best_rating.append(float(rating[indbest]))
+        self.length += 1
+        if generation % self.every:
+            return
+        if self.top is not None:
+            p = p[np.argsort(rating, kind='stable')[:self.shape[0]]]
+        block = np.packbits(p, axis=1)
+        if self.file is not None:
+            self.file.write(block.tobytes())
+        else:
+            if self.recorded % self.chunk == 0:
+                self.chunks.append(np.empty((self.chunk,) + self.shape, dtype=np.uint8))
+            self.chunks[-1][self.recorded % self.chunk] = block
+        self.generations.append(generation)
+        self.recorded += 1
+
+    # List of (x, rating) pairs of the best solution of every generation
+    @property
+    def iterbest(self):
+        return list(zip(self.best_x, self.best_rating))
+
+    def __len__(self):
+        return self.recorded
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.recorded
+        if not 0 <= i < self.recorded:
+            raise IndexError('history index out of range')
+        if self.file is None:
+            block = self.chunks[i // self.chunk][i % self.chunk]
+        else:
+            if self.mapped is None or self.mapped.shape[0] != self.recorded:
+                self.flush()
+                self.mapped = np.memmap(self.path, dtype=np.uint8, mode='r', shape=(self.recorded,) + self.shape)
+            block = self.mapped[i]
+        return np.unpackbits(block, axis=1, count=self.r)
+
+    def __iter__(self):
+        return (self[i] for i in range(self.recorded))
+
+    # Writes the stored populations of an on-disk history to its file
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
 
 
 # Main evolutionary algorithm function
@@ -99,33 +241,49 @@ def mutate(p, mp=0.01):
 # e - stopping criterion, based on the difference between the best solutions in the last two generations
 # cp - crossover probability
 # mp - mutation probability
-def evolutionary_algorithm(n, r, f, e=0.001, cp=0.5, mp=0.01):
+# cache - optional FitnessCache for f, its statistics can be read after the run
+# backend - how f is evaluated: 'serial', 'vectorized' or 'process' (see evaluate)
+# workers - number of processes of the 'process' backend, the pool persists for the whole run
+# max_generations - max iteration safeguard
+# history - RunHistory the run is recorded to, by default every generation is kept in memory
+# Returns the best individual, the list of best (x, rating) pairs of every generation and the history.
+def evolutionary_algorithm(n, r, f, e=0.001, cp=0.5, mp=0.01, cache=None, backend='serial', workers=None,
+                           max_generations=502, history=None):
+    if history is None:
+        history = RunHistory(n, r)
+    pool = ProcessPoolExecutor(max_workers=workers) if backend == 'process' else None
+    try:
+        best = run_generations(n, r, f, e, cp, mp, cache, backend, pool, max_generations, history)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    history.flush()
+    return best, history.iterbest, history
+
+
+def run_generations(n, r, f, e, cp, mp, cache, backend, pool, max_generations, history):
     stop = False
     iter = 0
 
     p = create_population(n, r)  # Initial population
-    iterbest = []  # List of best solutions over iterations, for visualization
-    iterpopul = []  # List of populations over iterations, for visualization
 
     while not stop:
-        iterpopul.append(p.copy())
-
-        rating = rate_population(p, f)  # Evaluate population
+        rating = rate_population(p, f, cache, backend, pool)  # Evaluate population
 
         # Save the best solution of the current generation
-        indbest = rating.index(min(rating))
-        ratingbest = min(rating)
-        iterbest.append((binary_to_decimal(p[indbest]), ratingbest))
+        indbest = int(np.argmin(rating))
+        ratingbest = rating[indbest]
+        history.record(p, rating, indbest)
 
         # Stopping condition
         if iter > 50:
             if abs(ratingbest - ratingbest_prev) <= e:
                 stop = True
-        if iter > 500:  # Max iteration safeguard
+        if iter + 1 >= max_generations:  # Max iteration safeguard
             stop = True
 
         if stop:  # Return the best solution found
-            return p[indbest], iterbest, iterpopul
+            return p[indbest]
 
         p_prime = select(rating, p, n)  # Selection
         p_dprime = crossing(p_prime, n, r, cp)  # Crossover
@@ -133,60 +291,198 @@ def evolutionary_algorithm(n, r, f, e=0.001, cp=0.5, mp=0.01):
         ratingbest_prev = ratingbest
 
         iter += 1
-        p = [i.copy() for i in p_new]
-
-
-# Plots an animation of the best solutions over time
-def plot_animation(iterbest, function, interval=100):
-    fig, ax = plt.subplots()
+        p = p_new
+
+
+# One island of the island model, run in its own process. The island evolves its own population and
+# after every `interval` generations sends its best rating, best individual and its `migrants` best
+# individuals with their ratings to the coordinator through conn. It then receives (immigrants, stop) - the immigrants
+# replace its worst individuals. An exception raised on the island is sent to the coordinator in place of a report.
+def island(n, r, f, cp, mp, interval, migrants, backend, seed, conn):
+    global rng
+    rng = np.random.default_rng(seed)  # Independent random stream of this island
+
+    try:
+        p = create_population(n, r)
+        rating = rate_population(p, f, backend=backend)
+        while True:
+            for _ in range(interval):
+                p = mutate(crossing(select(rating, p, n), n, r, cp), mp)
+                rating = rate_population(p, f, backend=backend)
+
+            order = np.argsort(rating)
+            conn.send((rating[order[0]], p[order[0]], p[order[:migrants]], rating[order[:migrants]]))
+
+            immigrants, stop = conn.recv()
+            if stop:
+                return
+            if len(immigrants):
+                # Only the replaced rows change, so only the immigrants are rated
+                worst = order[len(p) - len(immigrants):]
+                p[worst] = immigrants
+                rating[worst] = rate_population(immigrants, f, backend=backend)
+    except Exception as error:
+        try:
+            conn.send(error)
+        except Exception:  # The exception itself cannot be pickled
+            conn.send(RuntimeError(repr(error)))
+    finally:
+        conn.close()
+
+
+# Receives the next report of an island, re-raising the exception of a failed island. The island's process
+# is checked while waiting, so an island that died without a report does not block the coordinator.
+def receive_report(conn, process, timeout=0.1):
+    while not conn.poll(timeout):
+        if not process.is_alive() and not conn.poll():
+            raise RuntimeError(f'Island process {process.name} exited with code {process.exitcode}')
+    try:
+        report = conn.recv()
+    except EOFError:
+        raise RuntimeError(f'Island process {process.name} exited with code {process.exitcode}') from None
+    if isinstance(report, BaseException):
+        raise report
+    return report
+
+
+# Island model evolutionary algorithm - `islands` populations of n individuals evolve in separate processes,
+# and every `interval` generations the `migrants` best individuals of every island migrate:
+# - topology='ring' - island i sends its migrants to island i + 1
+# - topology='full' - every island receives the best `migrants` individuals of all the other islands
+# The run stops when the global best rating reaches target, when it changes by at most e between two migrations
+# (after the first 50 generations, as in evolutionary_algorithm), or after max_generations generations.
+# Returns the best individual and the list of global best (x, rating) pairs after every migration.
+def island_model(n, r, f, islands=4, interval=10, migrants=2, topology='ring', target=None, e=0.001, cp=0.5,
+                 mp=0.01, max_generations=500, backend='vectorized', seed=None):
+    if topology not in ('ring', 'full'):
+        raise ValueError(f'Unknown topology {topology}')
+
+    connections = []
+    processes = []
+    for island_seed in np.random.SeedSequence(seed).spawn(islands):
+        parent, child = Pipe()
+        process = Process(target=island, args=(n, r, f, cp, mp, interval, migrants, backend, island_seed, child))
+        process.start()
+        child.close()  # Only the island holds this end, so its pipe reports EOF if the island dies
+        connections.append(parent)
+        processes.append(process)
+
+    best, best_rating = None, np.inf
+    iterbest = []
+    generations = 0
+    finished = False
+    try:
+        while True:
+            reports = [receive_report(conn, process) for conn, process in zip(connections, processes)]
+            generations += interval
+            previous = best_rating
+            for rating, individual, _, _ in reports:
+                if rating < best_rating:
+                    best, best_rating = individual, rating
+            iterbest.append((binary_to_decimal(best), best_rating))
+
+            stop = (generations >= max_generations or (target is not None and best_rating <= target)
+                    or (generations > 50 and abs(best_rating - previous) <= e))
+
+            for i, conn in enumerate(connections):
+                if topology == 'ring':
+                    immigrants = reports[i - 1][2]
+                else:
+                    others = [reports[j] for j in range(islands) if j != i] or [reports[i]]
+                    candidates = np.concatenate([report[2] for report in others])
+                    ratings = np.concatenate([report[3] for report in others])
+                    immigrants = candidates[np.argsort(ratings)[:migrants]]
+                conn.send((immigrants if islands > 1 else immigrants[:0], stop))
+            if stop:
+                finished = True
+                return best, iterbest
+    finally:
+        for conn, process in zip(connections, processes):
+            if not finished:  # The other islands wait for an answer that never comes
+                process.terminate()
+            process.join()
+            conn.close()
+
+
+# Reduces the curve (x, y) to the pixel width of the axes - in every column of pixels only the lowest and
+# the highest point are kept, in their original order, so the drawn curve looks the same. The samples left over
+# after the last full column form a final, shorter one, and both end points are always kept.
+def decimate_curve(x, y, width):
+    bins = max(1, x.shape[0] // max(1, int(width)))
+    m = x.shape[0] // bins * bins
+    ys = y[:m].reshape(-1, bins)
+    offset = np.arange(ys.shape[0]) * bins
+    imin = ys.argmin(axis=1) + offset
+    imax = ys.argmax(axis=1) + offset
+    if m < x.shape[0]:
+        imin = np.append(imin, m + y[m:].argmin())
+        imax = np.append(imax, m + y[m:].argmax())
+    idx = np.unique(np.concatenate([[0], imin, imax, [x.shape[0] - 1]]))
+    return x[idx], y[idx]
+
+
+# Draws the static function curve once, decimated to the width of the axes
+def plot_function(ax, function):
     x_vals = np.linspace(-8, 8, 100000)
-    y_vals = function(x_vals)
+    ax.plot(*decimate_curve(x_vals, function(x_vals), ax.bbox.width), label='Function')
+    ax.set_xlim(-8, 8)
+    ax.grid(True)
+
+
+# Runs the animation: shown in a window, or with path written straight to a video file - .gif through Pillow,
+# anything else (.mp4) through ffmpeg - without a display.
+def run_animation(fig, update, frames, interval, path=None):
+    ani = animation.FuncAnimation(fig, update, frames=frames, repeat=False, interval=interval, blit=True)
+    if path is None:
+        plt.show()
+    else:
+        fps = 1000 / interval
+        writer = animation.PillowWriter(fps=fps) if path.endswith('.gif') else animation.FFMpegWriter(fps=fps)
+        ani.save(path, writer=writer)
+        plt.close(fig)
+    return ani
+
+
+# Plots an animation of the best solutions over time.
+# Only the line of the previous best points, the current point and the label are redrawn in every frame (blitting).
+def plot_animation(iterbest, function, interval=100, path=None):
+    fig, ax = plt.subplots()
+    plot_function(ax, function)
+    best = np.array(iterbest, dtype=float).reshape(-1, 2)
+    ax.set_ylim(*ax.get_ylim())
 
-    best_points_x = []
-    best_points_y = []
+    previous, = ax.plot([], [], color='gray', linestyle='--', linewidth=1, marker='o', label='Previous best points')
+    current, = ax.plot([], [], color='red', linestyle='', marker='o', label='Current best point')
+    label = ax.text(0.02, 0.95, '', transform=ax.transAxes)
+    ax.legend(loc='upper right')
 
     def update(frame):
-        ax.clear()
-        ax.plot(x_vals, y_vals, label='Function')
-
-        best_x, best_y = iterbest[frame]
-        best_points_x.append(best_x)
-        best_points_y.append(best_y)
-
-        ax.scatter(best_points_x, best_points_y, color='gray', label='Previous best points')
-        ax.scatter([best_x], [best_y], color='red', label='Current best point')
-
-        for i in range(1, len(best_points_x)):
-            ax.plot(best_points_x[i - 1:i + 1], best_points_y[i - 1:i + 1], color='gray', linestyle='--', linewidth=1)
+        previous.set_data(best[:frame + 1, 0], best[:frame + 1, 1])
+        current.set_data(best[frame:frame + 1, 0], best[frame:frame + 1, 1])
+        label.set_text(f'Iteration {frame}, Best point: ({best[frame, 0]:.2f}, {best[frame, 1]:.2f})')
+        return previous, current, label
 
-        ax.set_title(f'Iteration {frame}, Best point: ({best_x:.2f}, {best_y:.2f})')
-        ax.legend()
-        ax.grid(True)
+    return run_animation(fig, update, best.shape[0], interval, path)
 
-    ani = animation.FuncAnimation(fig, update, frames=len(iterbest), repeat=False, interval=interval)
-    plt.show()
 
-
-# Plots an animation showing the population distribution over time
-def plot_animation2(iterpopul, function, interval=100):
+# Plots an animation showing the population distribution over time.
+# iterpopul is a list of populations or a RunHistory - only the population of the frame being drawn is read
+# back and decoded, and all individuals are moved in a single scatter collection.
+def plot_animation2(iterpopul, function, interval=100, path=None):
     fig, ax = plt.subplots()
-    x_vals = np.linspace(-8, 8, 100000)
-    y_vals = function(x_vals)
-
-    def update(frame):
-        ax.clear()
-        ax.plot(x_vals, y_vals, label='Function')
+    plot_function(ax, function)
+    generations = getattr(iterpopul, 'generations', range(len(iterpopul)))
 
-        for population in iterpopul[frame]:
-            x_values = binary_to_decimal(population)
-            y_values = function(x_values)
-            ax.scatter(x_values, y_values, color='blue')
+    points = ax.scatter([], [], color='blue')
+    label = ax.text(0.02, 0.95, '', transform=ax.transAxes)
 
-        ax.set_title(f'Population in iteration {frame}')
-        ax.grid(True)
+    def update(frame):
+        x_values = binary_to_decimal(iterpopul[frame])
+        points.set_offsets(np.column_stack([x_values, function(x_values)]))
+        label.set_text(f'Population in iteration {generations[frame]}')
+        return points, label
 
-    ani = animation.FuncAnimation(fig, update, frames=len(iterpopul), repeat=False, interval=interval)
-    plt.show()
+    return run_animation(fig, update, len(iterpopul), interval, path)
 
 
 # Example functions used as fitness functions in the evolutionary algorithm
@@ -209,8 +505,30 @@ def func3(x):
 
 
 # Example usage:
-
-for f in (funcf, func1, func2, func3):
-    best, iterbest, iterpop = evolutionary_algorithm(60, 25, f)
-    plot_animation(iterbest, f)
-    plot_animation2(iterpop, f)
+if __name__ == '__main__':
+    for f in (funcf, func1, func2, func3):
+        best, iterbest, iterpop = evolutionary_algorithm(60, 25, f)
+        plot_animation(iterbest, f)
+        plot_animation2(iterpop, f)
+
+    # Fitness memoization - most individuals of later generations are duplicates
+    cache = FitnessCache(funcf, maxsize=10000)
+    best, iterbest, iterpop = evolutionary_algorithm(60, 25, funcf, cache=cache)
+    print(cache.cache_info())
+
+    # Run of up to 10000 generations recorded to disk - the top 10 individuals of every 10th generation
+    history = RunHistory(2000, 25, every=10, top=10, path='history.bin')
+    best, iterbest, iterpop = evolutionary_algorithm(2000, 25, funcf, backend='vectorized',
+                                                     max_generations=10000, history=history)
+    plot_animation2(iterpop, funcf, path='history.gif')  # Written to a file, no display needed
+
+    # Evaluation backends - one call of f on the whole decoded population, or chunks on a process pool
+    best, iterbest, iterpop = evolutionary_algorithm(100000, 25, funcf, backend='vectorized')
+    print(binary_to_decimal(best))
+    best, iterbest, iterpop = evolutionary_algorithm(1000, 25, funcf, backend='process', workers=4)
+    print(binary_to_decimal(best))
+
+    # Island model - 4 populations in separate processes, exchanging their best individuals every 10 generations
+    best, iterbest = island_model(60, 25, funcf, islands=4, interval=10, topology='ring', target=1e-6)
+    print(binary_to_decimal(best), iterbest[-1], len(iterbest))
+    plot_animation(iterbest, funcf)
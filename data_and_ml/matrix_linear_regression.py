@@ -11,74 +11,402 @@ And it can be solved using the following equation:
 A = (X^T * X)^(-1) * X^T * Y
 
 This formula ensures that the given data will lead to a solution, even if the matrix is not square
+
+X^T * X is never inverted explicitly - its condition number is the square of the condition number of X.
+The system is solved through a factorization of X instead (see SOLVERS), optionally with the columns of X
+scaled to unit norm or in the Chebyshev basis on the range of x, which keeps high degrees well conditioned.
 """
 
 
-def linreg(x, y, n=1):
-    if n == 1:
-        x = np.column_stack([x, np.ones((x.shape[0], 1))])
-        coeff = np.transpose(np.linalg.inv((np.transpose(x) @ x)) @ np.transpose(x) @ y)
-        return coeff[0]
+# Design matrix [x^n, ..., x^2, x, 1] of degree n, built in one allocation - every column is the previous
+# one multiplied by x. The columns are stored contiguously (Fortran order), as the solvers read them.
+def vandermonde(x, n):
+    x = np.asarray(x, dtype=float).ravel()
+    X = np.empty((x.shape[0], n + 1), order='F')
+    X[:, n] = 1
+    for i in range(n - 1, -1, -1):
+        np.multiply(X[:, i + 1], x, out=X[:, i])
+    return X
+
+
+# Design matrix [T_0(t), ..., T_n(t)] of the Chebyshev polynomials of t, x mapped from domain to [-1, 1]
+def chebyshev_design(x, n, domain):
+    t = np.polynomial.polyutils.mapdomain(np.asarray(x, dtype=float).ravel(), domain, [-1, 1])
+    return np.polynomial.chebyshev.chebvander(t, n)
+
+
+# Converts (n + 1, k) coefficients of the Chebyshev design matrix to coefficients of the powers of x,
+# from the highest power down
+def chebyshev_to_powers(coeff, domain):
+    powers = np.zeros_like(coeff)
+    for j in range(coeff.shape[1]):
+        c = np.polynomial.Chebyshev(coeff[:, j], domain=domain).convert(kind=np.polynomial.Polynomial).coef
+        powers[coeff.shape[0] - c.shape[0]:, j] = c[::-1]
+    return powers
+
+
+# Least squares solution A of XA = Y through the reduced QR decomposition X = QR: RA = Q^T Y
+def solve_qr(X, Y):
+    Q, R = np.linalg.qr(X)
+    return np.linalg.solve(R, Q.T @ Y)
+
+
+# Least squares solution through the Cholesky factor of the Gram matrix X^T X = LL^T - the fastest
+# for many rows, as X is read only once, but it squares the condition number of X
+def solve_cholesky(X, Y):
+    L = np.linalg.cholesky(X.T @ X)
+    return np.linalg.solve(L.T, np.linalg.solve(L, X.T @ Y))
+
+
+# Least squares solution through the SVD of X (LAPACK gelsd), which also handles rank deficient X
+def solve_svd(X, Y):
+    return np.linalg.lstsq(X, Y, rcond=None)[0]
+
+
+SOLVERS = {'qr': solve_qr, 'cholesky': solve_cholesky, 'svd': solve_svd}
+
+
+# Fits a polynomial of degree n to the data (x, y), returning its coefficients from the highest power down.
+# y can have several columns, fitted together with one factorization of X - the coefficients are then
+# an (n + 1, k) array with one column per column of y.
+# method - 'qr', 'cholesky' or 'svd' (see SOLVERS)
+# basis - 'monomial' solves for the powers of x directly, 'scaled' scales every column of X to unit norm,
+#         'chebyshev' fits Chebyshev polynomials of x mapped from its range to [-1, 1]; the coefficients are
+#         always returned for the powers of x
+def linreg(x, y, n=1, method='qr', basis='monomial'):
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float)
+    Y = y.reshape(x.shape[0], -1)
+    solve = SOLVERS[method]
+
+    if basis == 'monomial':
+        coeff = solve(vandermonde(x, n), Y)
+    elif basis == 'scaled':
+        X = vandermonde(x, n)
+        norms = np.linalg.norm(X, axis=0)
+        norms[norms == 0] = 1
+        X /= norms
+        coeff = solve(X, Y) / norms[:, None]
+    elif basis == 'chebyshev':
+        domain = [x.min(), x.max()]
+        coeff = chebyshev_to_powers(solve(chebyshev_design(x, n, domain), Y), domain)
+    else:
+        raise ValueError(f'Unknown basis {basis}')
+
+    return coeff[:, 0] if y.ndim == 1 or y.shape[1] == 1 else coeff
+
+
+# Polynomial regression on data streamed in chunks - only the sufficient statistics X^T X and X^T Y of
+# all the data seen so far are kept, so the data can be larger than memory (see chunks). States built on
+# separate parts of the data (e.g. in separate processes) merge into the state of all of it.
+# n - degree, k - number of y columns
+# domain - with a fixed (lo, hi) range of x, the Chebyshev basis on it is used for conditioning (see linreg)
+class StreamingLinreg:
+    def __init__(self, n=1, k=1, domain=None):
+        self.n = n
+        self.domain = domain
+        self.count = 0
+        self.gram = np.zeros((n + 1, n + 1))
+        self.xty = np.zeros((n + 1, k))
+
+    def design(self, x):
+        return vandermonde(x, self.n) if self.domain is None else chebyshev_design(x, self.n, self.domain)
+
+    def update(self, x, y):
+        X = self.design(x)
+        self.gram += X.T @ X
+        self.xty += X.T @ np.asarray(y, dtype=float).reshape(X.shape[0], -1)
+        self.count += X.shape[0]
+        return self
+
+    def fit(self, chunks):
+        for x, y in chunks:
+            self.update(x, y)
+        return self
+
+    def merge(self, other):
+        if (other.n, other.domain) != (self.n, self.domain):
+            raise ValueError('Only states of the same degree and basis can be merged')
+        self.gram += other.gram
+        self.xty += other.xty
+        self.count += other.count
+        return self
+
+    # Least squares solution of the data seen so far, from the Cholesky factor of X^T X scaled to a unit diagonal
+    def solution(self):
+        scale = np.sqrt(np.diag(self.gram))
+        scale[scale == 0] = 1
+        L = np.linalg.cholesky(self.gram / np.outer(scale, scale))
+        return np.linalg.solve(L.T, np.linalg.solve(L, self.xty / scale[:, None])) / scale[:, None]
+
+    # Coefficients of the powers of x from the highest down, as returned by linreg
+    def coefficients(self):
+        coeff = self.solution()
+        if self.domain is not None:
+            coeff = chebyshev_to_powers(coeff, self.domain)
+        return coeff[:, 0] if coeff.shape[1] == 1 else coeff
+
+    # Recursive least squares regressor continuing from the current solution
+    def recursive(self, forgetting=1.0):
+        rls = RecursiveLinreg(self.n, self.xty.shape[1], self.domain, forgetting)
+        rls.P = np.linalg.inv(self.gram)
+        rls.A = self.solution()
+        return rls
+
+
+# Recursive least squares - the solution A and P = (X^T X)^(-1) are updated with every new batch of b rows
+# through the Woodbury identity, at the cost of a b x b solve:
+# K = P X_b^T (I + X_b P X_b^T)^(-1), A += K (Y_b - X_b A), P -= K X_b P
+# forgetting - factor in (0, 1] by which the weight of older data decays with every batch
+# delta - initial P = delta * I of a regressor started without data
+class RecursiveLinreg:
+    def __init__(self, n=1, k=1, domain=None, forgetting=1.0, delta=1e6):
+        self.n = n
+        self.domain = domain
+        self.forgetting = forgetting
+        self.P = delta * np.eye(n + 1)
+        self.A = np.zeros((n + 1, k))
+
+    def design(self, x):
+        return vandermonde(x, self.n) if self.domain is None else chebyshev_design(x, self.n, self.domain)
+
+    def update(self, x, y):
+        X = self.design(x)
+        Y = np.asarray(y, dtype=float).reshape(X.shape[0], -1)
+        P = self.P / self.forgetting
+        PXt = P @ X.T
+        K = np.linalg.solve(np.eye(X.shape[0]) + X @ PXt, PXt.T).T
+        self.A += K @ (Y - X @ self.A)
+        self.P = P - K @ PXt.T
+        return self
+
+    def coefficients(self):
+        coeff = self.A if self.domain is None else chebyshev_to_powers(self.A, self.domain)
+        return coeff[:, 0] if coeff.shape[1] == 1 else coeff
 
-    temp = x.copy()
-    for i in range(2, n + 1):
-        x = np.column_stack([temp ** i, x])
-    x = np.column_stack([x, np.ones((x.shape[0], 1))])
-    coeff = np.transpose(np.linalg.inv((np.transpose(x) @ x)) @ np.transpose(x) @ y)
-    return coeff[0]
+
+# Splits x and y (arrays or memory-mapped files, np.load(path, mmap_mode='r')) into chunks of chunk_size rows,
+# so only one chunk is read into memory at a time
+def chunks(x, y, chunk_size=1000000):
+    for start in range(0, x.shape[0], chunk_size):
+        yield np.asarray(x[start:start + chunk_size]), np.asarray(y[start:start + chunk_size])
+
+
+# Design matrix of degree k with the columns in increasing degree - the design of every lower degree d is made
+# of its first d + 1 columns - and the function converting (d + 1, k) coefficients of these columns to
+# coefficients of the powers of x from the highest down.
+# basis - 'monomial' ([1, x, ..., x^k]) or 'chebyshev' ([T_0(t), ..., T_k(t)] on the range of x)
+def nested_design(x, k, basis='chebyshev'):
+    if basis == 'monomial':
+        return vandermonde(x, k)[:, ::-1], lambda coeff: coeff[::-1]
+    if basis == 'chebyshev':
+        domain = [np.min(x), np.max(x)]
+        return chebyshev_design(x, k, domain), lambda coeff: chebyshev_to_powers(coeff, domain)
+    raise ValueError(f'Unknown basis {basis}')
+
+
+# Splits the indexes of m rows into `folds` random folds
+def make_folds(m, folds, seed=None):
+    return np.array_split(np.random.default_rng(seed).permutation(m), folds)
+
+
+# Fits all polynomials of degrees 0, ..., k from one QR decomposition X = QR of the degree k design - the fit of
+# degree d solves the leading (d + 1) x (d + 1) block of R with the first d + 1 entries of Q^T Y.
+# Returns the coefficients of every degree (as returned by linreg) and their scores, summed over the columns of y:
+# - criterion='gcv' - generalized cross-validation, m * RSS / (m - d - 1)^2
+# - criterion='loocv' - leave-one-out mean squared error, from the residuals e_i / (1 - h_ii); the diagonal of
+#   the hat matrix of degree d is the sum of the squares of the first d + 1 entries of the rows of Q
+# - criterion='kfold' - `folds`-fold cross-validation mean squared error; the normal equations of every fold are
+#   the ones of all data minus the fold's rows, so nothing is refitted from the data
+# - criterion=None - residual sum of squares
+def fit_degrees(x, y, k, criterion='gcv', folds=5, basis='chebyshev', seed=None):
+    y = np.asarray(y, dtype=float)
+    Y = y.reshape(np.shape(x)[0], -1)
+    m = Y.shape[0]
+    X, to_powers = nested_design(x, k, basis)
+    Q, R = np.linalg.qr(X)
+    QtY = Q.T @ Y
+
+    coeffs = []
+    for d in range(k + 1):
+        coeff = to_powers(np.linalg.solve(R[:d + 1, :d + 1], QtY[:d + 1]))
+        coeffs.append(coeff[:, 0] if y.ndim == 1 or y.shape[1] == 1 else coeff)
+
+    rss = np.maximum(np.sum(Y ** 2) - np.cumsum(np.sum(QtY ** 2, axis=1)), 0)
+    if criterion is None:
+        scores = rss
+    elif criterion == 'gcv':
+        dof = np.arange(1, k + 2)
+        scores = np.where(dof < m, m * rss / np.maximum(m - dof, 1) ** 2, np.inf)
+    elif criterion == 'loocv':
+        scores = np.zeros(k + 1)
+        residual = Y.copy()
+        hat = np.zeros(m)
+        for d in range(k + 1):
+            residual -= np.outer(Q[:, d], QtY[d])
+            hat += Q[:, d] ** 2
+            scores[d] = np.sum((residual / (1 - hat)[:, None]) ** 2) / m
+    elif criterion == 'kfold':
+        scores = np.zeros(k + 1)
+        G = X.T @ X
+        B = X.T @ Y
+        for fold in make_folds(m, folds, seed):
+            XF = X[fold]
+            G_train = G - XF.T @ XF
+            B_train = B - XF.T @ Y[fold]
+            for d in range(k + 1):
+                coeff = np.linalg.solve(G_train[:d + 1, :d + 1], B_train[:d + 1])
+                scores[d] += np.sum((Y[fold] - XF[:, :d + 1] @ coeff) ** 2)
+        scores /= m
+    else:
+        raise ValueError(f'Unknown criterion {criterion}')
+    return coeffs, scores
+
+
+# Ridge regression of degree n for a whole grid of lambdas - minimizes ||XA - Y||^2 + lambda * ||A||^2, where A are
+# the coefficients of the basis (see nested_design), the constant term included. All lambdas are solved from one
+# SVD X = U S V^T: A = V diag(s / (s^2 + lambda)) U^T Y. Returns the coefficients for every lambda (as returned by
+# linreg) and their scores, as in fit_degrees:
+# - 'gcv' - m * RSS / (m - df)^2 with the effective degrees of freedom df = sum(s^2 / (s^2 + lambda))
+# - 'loocv' - with the hat matrix diagonal h_ii = sum_j U_ij^2 s_j^2 / (s_j^2 + lambda)
+# - 'kfold' - every fold is solved for all lambdas from one eigendecomposition of its normal equations
+# - None - residual sum of squares
+def ridge_path(x, y, n, lambdas, criterion='gcv', folds=5, basis='chebyshev', seed=None):
+    y = np.asarray(y, dtype=float)
+    Y = y.reshape(np.shape(x)[0], -1)
+    m = Y.shape[0]
+    lambdas = np.asarray(lambdas, dtype=float)
+    X, to_powers = nested_design(x, n, basis)
+    U, s, Vt = np.linalg.svd(X, full_matrices=False)
+    UtY = U.T @ Y
+    shrink = s ** 2 / (s[None, :] ** 2 + lambdas[:, None])  # (lambdas, n + 1)
+
+    coeffs = []
+    for l in range(lambdas.shape[0]):
+        coeff = to_powers(Vt.T @ (shrink[l][:, None] / s[:, None] * UtY))
+        coeffs.append(coeff[:, 0] if y.ndim == 1 or y.shape[1] == 1 else coeff)
+
+    rss = np.maximum(np.sum(Y ** 2) - np.sum(UtY ** 2) + (1 - shrink) ** 2 @ np.sum(UtY ** 2, axis=1), 0)
+    if criterion is None:
+        scores = rss
+    elif criterion == 'gcv':
+        scores = m * rss / (m - shrink.sum(axis=1)) ** 2
+    elif criterion == 'loocv':
+        hat = U ** 2 @ shrink.T  # (m, lambdas)
+        scores = np.array([
+            np.sum(((Y - U @ (shrink[l][:, None] * UtY)) / (1 - hat[:, l])[:, None]) ** 2) / m
+            for l in range(lambdas.shape[0])
+        ])
+    elif criterion == 'kfold':
+        scores = np.zeros(lambdas.shape[0])
+        G = X.T @ X
+        B = X.T @ Y
+        for fold in make_folds(m, folds, seed):
+            XF = X[fold]
+            D, V = np.linalg.eigh(G - XF.T @ XF)
+            VtB = V.T @ (B - XF.T @ Y[fold])
+            XFV = XF @ V
+            for l, lam in enumerate(lambdas):
+                scores[l] += np.sum((Y[fold] - XFV @ (VtB / (D + lam)[:, None])) ** 2)
+        scores /= m
+    else:
+        raise ValueError(f'Unknown criterion {criterion}')
+    return coeffs, scores
 
 
 # Example:
+if __name__ == '__main__':
+    x = np.random.uniform(-5, 5, size=200)
+    y = 0.5 * (x ** 3) + 3 * (x ** 2) - 2 * x - 10 + np.random.normal(scale=2, size=200)
+
+    x = x.reshape(-1, 1)
+    y = y.reshape(-1, 1)
+
+    a, b, c, d, e = linreg(x, y, 4)
+    print(f'\npredicted a = {a}\npredicted b = {b}\npredicted c = {c}\npredicted d = {d}\npredicted e = {e}')
+
+    x_temp = np.linspace(-5,5,200)
+    y_temp = a * (x_temp ** 4) + b * (x_temp ** 3) + c * (x_temp ** 2) + d * x_temp + e
+    plt.scatter(x, y)
+    plt.plot(x_temp, y_temp, color='r')
+    plt.xlabel('x')
+    plt.ylabel('y')
+    plt.grid(True)
+    plt.show()
+
+
+    a, b, c, d = linreg(x, y, 3)
+    print(f'\npredicted a = {a}\npredicted b = {b}\npredicted c = {c}\npredicted d = {d}')
+
+    y_temp = a * (x_temp ** 3) + b * (x_temp ** 2) + c * x_temp + d
+    plt.scatter(x, y)
+    plt.plot(x_temp, y_temp, color='r')
+    plt.xlabel('x')
+    plt.ylabel('y')
+    plt.grid(True)
+    plt.show()
+
+
+    a, b, c = linreg(x, y, 2)
+    print(f'\npredicted a = {a}\npredicted b = {b}\npredicted c = {c}')
+
+    y_temp = a * (x_temp ** 2) + b * x_temp + c
+    plt.scatter(x, y)
+    plt.plot(x_temp, y_temp, color='r')
+    plt.xlabel('x')
+    plt.ylabel('y')
+    plt.grid(True)
+    plt.show()
+
+    a, b = linreg(x, y)
+    print(f'\npredicted a = {a}\npredicted b = {b}')
+
+    y_temp = a * x_temp + b
+    plt.scatter(x, y)
+    plt.plot(x_temp, y_temp, color='r')
+    plt.xlabel('x')
+    plt.ylabel('y')
+    plt.grid(True)
+    plt.show()
+
+
+    # Degree 12 on [-5, 5] - relative error of the recovered coefficients of known polynomials
+    # for all solvers and bases, with two y columns fitted at once
+    x_big = np.random.uniform(-5, 5, size=100000)
+    coeff_true = np.random.normal(size=(13, 2))
+    Y_big = vandermonde(x_big, 12) @ coeff_true
+    for method in SOLVERS:
+        for basis in ('monomial', 'scaled', 'chebyshev'):
+            coeff = linreg(x_big, Y_big, 12, method=method, basis=basis)
+            error = np.abs(coeff - coeff_true).max() / np.abs(coeff_true).max()
+            print(f'{method}, {basis}: coefficient error {error:.1e}')
+
+
+    # Streaming - a memory-mapped file read in chunks, two halves fitted separately and merged,
+    # then the model is refreshed with recursive least squares as new batches arrive
+    np.save('x_stream.npy', x_big)
+    np.save('y_stream.npy', Y_big)
+    x_file = np.load('x_stream.npy', mmap_mode='r')
+    y_file = np.load('y_stream.npy', mmap_mode='r')
+    half = x_file.shape[0] // 2
+    first = StreamingLinreg(12, 2, domain=(-5, 5)).fit(chunks(x_file[:half], y_file[:half], 10000))
+    second = StreamingLinreg(12, 2, domain=(-5, 5)).fit(chunks(x_file[half:], y_file[half:], 10000))
+    coeff = first.merge(second).coefficients()
+    print(f'streamed: coefficient error {np.abs(coeff - coeff_true).max() / np.abs(coeff_true).max():.1e}')
+
+    rls = first.recursive()
+    for _ in range(10):
+        x_new = np.random.uniform(-5, 5, size=100)
+        rls.update(x_new, vandermonde(x_new, 12) @ coeff_true)
+    error = np.abs(rls.coefficients() - coeff_true).max() / np.abs(coeff_true).max()
+    print(f'recursive: coefficient error {error:.1e}')
+
+
+    # Model selection - all degrees up to 10 scored at once, then a ridge path for the chosen degree
+    for criterion in ('gcv', 'loocv', 'kfold'):
+        coeffs, scores = fit_degrees(x, y, 10, criterion=criterion, seed=0)
+        print(f'{criterion}: best degree {np.argmin(scores)}')
 
-x = np.random.uniform(-5, 5, size=200)
-y = 0.5 * (x ** 3) + 3 * (x ** 2) - 2 * x - 10 + np.random.normal(scale=2, size=200)
-
-x = x.reshape(-1, 1)
-y = y.reshape(-1, 1)
-
-a, b, c, d, e = linreg(x, y, 4)
-print(f'\npredicted a = {a}\npredicted b = {b}\npredicted c = {c}\npredicted d = {d}\npredicted e = {e}')
-
-x_temp = np.linspace(-5,5,200)
-y_temp = a * (x_temp ** 4) + b * (x_temp ** 3) + c * (x_temp ** 2) + d * x_temp + e
-plt.scatter(x, y)
-plt.plot(x_temp, y_temp, color='r')
-plt.xlabel('x')
-plt.ylabel('y')
-plt.grid(True)
-plt.show()
-
-
-a, b, c, d = linreg(x, y, 3)
-print(f'\npredicted a = {a}\npredicted b = {b}\npredicted c = {c}\npredicted d = {d}')
-
-y_temp = a * (x_temp ** 3) + b * (x_temp ** 2) + c * x_temp + d
-plt.scatter(x, y)
-plt.plot(x_temp, y_temp, color='r')
-plt.xlabel('x')
-plt.ylabel('y')
-plt.grid(True)
-plt.show()
-
-
-a, b, c = linreg(x, y, 2)
-print(f'\npredicted a = {a}\npredicted b = {b}\npredicted c = {c}')
-
-y_temp = a * (x_temp ** 2) + b * x_temp + c
-plt.scatter(x, y)
-plt.plot(x_temp, y_temp, color='r')
-plt.xlabel('x')
-plt.ylabel('y')
-plt.grid(True)
-plt.show()
-
-a, b = linreg(x, y)
-print(f'\npredicted a = {a}\npredicted b = {b}')
-
-y_temp = a * x_temp + b
-plt.scatter(x, y)
-plt.plot(x_temp, y_temp, color='r')
-plt.xlabel('x')
-plt.ylabel('y')
-plt.grid(True)
-plt.show()
+    lambdas = np.logspace(-6, 3, 50)
+    coeffs, scores = ridge_path(x, y, 10, lambdas, criterion='gcv')
+    print(f'ridge: best lambda {lambdas[np.argmin(scores)]:.1e}, coefficients {coeffs[np.argmin(scores)]}')
@@ -35,37 +35,92 @@ a_i = y_i
 b_i = m_i - h_i(2c_i+c_(i+1))/3
 
 d_i = (c_(i+1)-c_i)/(3h_i)
+
+A is tridiagonal, so the system is solved with the Thomas algorithm in O(n) time and memory - A is never built,
+only its three diagonals. Besides the natural conditions, the first and the last row can be replaced by:
+- clamped, S_0'(x_0) = s_0 and S_(n-2)'(x_(n-1)) = s_1:
+  2h_0 c_0 + h_0 c_1 = 3(m_0 - s_0), h_(n-2) c_(n-2) + 2h_(n-2) c_(n-1) = 3(s_1 - m_(n-2))
+- not-a-knot, d_0 = d_1 and d_(n-3) = d_(n-2): c_0 and c_(n-1) are eliminated from the second and the
+  second to last row, and the remaining system for c_1, ..., c_(n-2) is still tridiagonal
 """
 
 
-def natural_spline(points):
-    n = len(points)
-    x = np.array([p[0] for p in points])
-    y = np.array([p[1] for p in points])
+# Solves the tridiagonal system with the diagonals lower (lower[0] unused), diag and upper (upper[-1] unused)
+# by the Thomas algorithm - forward elimination and back substitution, without pivoting
+def thomas(lower, diag, upper, rhs):
+    a, b, c, d = lower.tolist(), diag.tolist(), upper.tolist(), rhs.tolist()
+    n = len(b)
+    cp = [0.0] * n
+    dp = [0.0] * n
+    cp[0] = c[0] / b[0]
+    dp[0] = d[0] / b[0]
+    for i in range(1, n):
+        w = b[i] - a[i] * cp[i - 1]
+        cp[i] = c[i] / w
+        dp[i] = (d[i] - a[i] * dp[i - 1]) / w
+    for i in range(n - 2, -1, -1):
+        dp[i] -= cp[i] * dp[i + 1]
+    return np.array(dp)
+
+
+# Cubic spline through points (a list of [x, y] pairs or an (n, 2) array, x increasing).
+# boundary - 'natural', 'clamped' (with the end slopes (s_0, s_1)) or 'not-a-knot' (at least 4 points)
+# Returns an (n - 1, 4) array with the coefficients a_i, b_i, c_i, d_i of every interval in its rows.
+def cubic_spline(points, boundary='natural', slopes=(0, 0)):
+    points = np.asarray(points, dtype=float)
+    x = points[:, 0]
+    y = points[:, 1]
+    n = x.shape[0]
 
     h = np.diff(x)
-    A = np.zeros((n, n))
-    B = np.zeros(n)
+    m = np.diff(y) / h
 
-    A[0, 0] = 1
-    A[-1, -1] = 1
+    lower = np.zeros(n)
+    diag = np.ones(n)
+    upper = np.zeros(n)
+    B = np.zeros(n)
+    lower[1:-1] = h[:-1]
+    diag[1:-1] = 2 * (h[:-1] + h[1:])
+    upper[1:-1] = h[1:]
+    B[1:-1] = 3 * (m[1:] - m[:-1])
+
+    if boundary == 'natural':
+        c = thomas(lower, diag, upper, B)
+    elif boundary == 'clamped':
+        diag[0], upper[0], B[0] = 2 * h[0], h[0], 3 * (m[0] - slopes[0])
+        lower[-1], diag[-1], B[-1] = h[-1], 2 * h[-1], 3 * (slopes[1] - m[-1])
+        c = thomas(lower, diag, upper, B)
+    elif boundary == 'not-a-knot':
+        if n < 4:
+            raise ValueError('Not-a-knot spline needs at least 4 points')
+        # c_0 = ((h_0 + h_1) c_1 - h_0 c_2) / h_1, c_(n-1) = ((h_(n-3) + h_(n-2)) c_(n-2) - h_(n-2) c_(n-3)) / h_(n-3)
+        diag[1] = (h[0] + h[1]) * (h[0] + 2 * h[1]) / h[1]
+        upper[1] = (h[1] ** 2 - h[0] ** 2) / h[1]
+        diag[-2] = (h[-2] + h[-1]) * (h[-1] + 2 * h[-2]) / h[-2]
+        lower[-2] = (h[-2] ** 2 - h[-1] ** 2) / h[-2]
+        c = np.zeros(n)
+        c[1:-1] = thomas(lower[1:-1], diag[1:-1], upper[1:-1], B[1:-1])
+        c[0] = ((h[0] + h[1]) * c[1] - h[0] * c[2]) / h[1]
+        c[-1] = ((h[-2] + h[-1]) * c[-2] - h[-1] * c[-3]) / h[-2]
+    else:
+        raise ValueError(f'Unknown boundary condition {boundary}')
+
+    b = m - h * (2 * c[:-1] + c[1:]) / 3
+    d = (c[1:] - c[:-1]) / (3 * h)
+    return np.column_stack([y[:-1], b, c[:-1], d])
 
-    for i in range(1, n - 1):
-        A[i, i - 1] = h[i - 1]
-        A[i, i] = 2 * (h[i - 1] + h[i])
-        A[i, i + 1] = h[i]
-        B[i] = 3 * ((y[i + 1] - y[i]) / h[i] - (y[i] - y[i - 1]) / h[i - 1])
 
-    c = np.linalg.solve(A, B)
+def natural_spline(points):
+    return cubic_spline(points, 'natural')
 
-    a = y[:-1]
-    b = np.zeros(n - 1)
-    d = np.zeros(n - 1)
 
-    for i in range(n - 1):
-        b[i] = (y[i + 1] - y[i]) / h[i] - h[i] * (2 * c[i] + c[i + 1]) / 3
-        d[i] = (c[i + 1] - c[i]) / (3 * h[i])
-    return list(zip(a, b, c[:-1], d))
+# Evaluates the spline with the knots x and the coefficients of cubic_spline at the points x_new,
+# the intervals of all points are found with one binary search
+def spline_eval(x, coefficients, x_new):
+    i = np.clip(np.searchsorted(x, x_new, side='right') - 1, 0, coefficients.shape[0] - 1)
+    t = x_new - x[i]
+    a, b, c, d = coefficients[i].T
+    return a + t * (b + t * (c + t * d))
 
 
 # Example:
@@ -76,14 +131,7 @@ coefficients = natural_spline(points)
 x_vals = np.array([p[0] for p in points])
 y_vals = np.array([p[1] for p in points])
 x_new = np.linspace(x_vals.min(), x_vals.max(), 1000)
-y_new = np.zeros_like(x_new)
-
-for i in range(len(coefficients)):
-    xi = x_vals[i]
-    a, b, c, d = coefficients[i]
-    temp = (x_new >= xi) & (x_new <= x_vals[i + 1])
-    y_new[temp] = a + b * (x_new[temp] - xi) + c * (x_new[temp] - xi) ** 2 + d * (x_new[temp] - xi) ** 3
-
+y_new = spline_eval(x_vals, coefficients, x_new)
 
 plt.scatter(x_vals, y_vals, color='red', label='Original Points')
 plt.plot(x_new, y_new, label='Natural Cubic Spline')
@@ -93,3 +141,13 @@ plt.ylabel('y')
 plt.legend()
 plt.grid(True)
 plt.show()
+
+
+# Boundary conditions compared
+for boundary in ('natural', 'clamped', 'not-a-knot'):
+    plt.plot(x_new, spline_eval(x_vals, cubic_spline(points, boundary), x_new), label=boundary)
+plt.scatter(x_vals, y_vals, color='red', label='Original Points')
+plt.title('Cubic Spline Boundary Conditions')
+plt.legend()
+plt.grid(True)
+plt.show()